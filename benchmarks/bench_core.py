@@ -0,0 +1,122 @@
+"""Benchmarks of the core objects, in the format of asv (https://asv.readthedocs.io). Run them with `asv run`
+from the root of the repository, or `asv dev` to test them against the current sources.
+
+Each suite is parametrised by the number of frames of the sequences, and builds its record with
+theonerig.testdata.synthetic_record."""
+import os, shutil, tempfile
+import numpy as np
+
+from theonerig.core import ContiguousRecord, Data_Pipe, export_record, import_record, export_record_mmap, import_record_mmap
+from theonerig.testdata import synthetic_record
+
+LENGTHS = [10000, 100000, 1000000]
+
+class ContiguousRecordSuite:
+    params      = [LENGTHS, [1, 100]]
+    param_names = ["length", "fragmentation"]
+
+    def setup(self, length, fragmentation):
+        self.reM    = synthetic_record(length=length, n_stims=8, n_cells=50, fragmentation=fragmentation)
+        self.seq    = self.reM[0]
+        self.chunks = self.seq.get_pieces("S_matrix")
+
+    def time_insert(self, length, fragmentation):
+        seq = ContiguousRecord(length, self.seq.get("signals"), self.seq.get("main_tp"))
+        for dc in self.chunks:
+            seq["S_matrix"] = dc
+
+    def time_getitem(self, length, fragmentation):
+        self.seq["S_matrix"]
+
+    def time_getitem_stim(self, length, fragmentation):
+        self.seq["checkerboard"]
+
+    def time_get_slice(self, length, fragmentation):
+        self.seq.get("S_matrix", slice(length//4, length//2))
+
+    def peakmem_getitem(self, length, fragmentation):
+        self.seq["S_matrix"]
+
+class RecordMasterSuite:
+    params      = [LENGTHS]
+    param_names = ["length"]
+
+    def setup(self, length):
+        self.reM = synthetic_record(n_sequences=4, length=length//4, n_stims=8, fragmentation=10)
+
+    def time_getitem(self, length):
+        self.reM["S_matrix"]
+
+    def time_keys(self, length):
+        self.reM.keys()
+
+class DataPipeSuite:
+    params      = [LENGTHS]
+    param_names = ["length"]
+
+    def setup(self, length):
+        self.reM  = synthetic_record(n_sequences=4, length=length//4, n_stims=16, fragmentation=10)
+        self.pipe = Data_Pipe(self.reM, ["checkerboard", "S_matrix"], ["stim", "cells"])
+        self.pipe += "checkerboard"
+        self.pipe &= "S_matrix"
+
+    def time_pipe_algebra(self, length):
+        pipe = Data_Pipe(self.reM, ["S_matrix", "eye_tracking"])
+        pipe += ["checkerboard", "chirp_am"]
+        pipe |= "fullfield_flicker"
+        pipe -= "chirp_am"
+        pipe ^= "moving_gratings"
+        pipe &= "S_matrix"
+        len(pipe) #The operators are only recorded, the slices are computed when first needed
+
+    def time_iteration(self, length):
+        for data in self.pipe:
+            pass
+
+    def time_iter_prefetch(self, length):
+        for data in self.pipe.iter_prefetch(depth=2):
+            pass
+
+    def time_to_batch(self, length):
+        self.pipe.to_batch()
+
+    def peakmem_iteration(self, length):
+        for data in self.pipe:
+            pass
+
+class IOSuite:
+    params      = [LENGTHS]
+    param_names = ["length"]
+    timeout     = 300
+
+    def setup(self, length):
+        self.reM     = synthetic_record(n_sequences=2, length=length//2, n_stims=8, fragmentation=10)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.h5_path = os.path.join(self.tmp_dir, "reM.h5")
+        self.mmap_dir = os.path.join(self.tmp_dir, "reM_mmap")
+        export_record(self.h5_path, self.reM, verbose=False)
+        export_record_mmap(self.mmap_dir, self.reM)
+
+    def teardown(self, length):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_export(self, length):
+        export_record(os.path.join(self.tmp_dir, "export.h5"), self.reM, verbose=False)
+
+    def time_export_parallel(self, length):
+        export_record(os.path.join(self.tmp_dir, "export.h5"), self.reM, workers=4, verbose=False)
+
+    def time_export_mmap(self, length):
+        export_record_mmap(os.path.join(self.tmp_dir, "export_mmap"), self.reM)
+
+    def time_import(self, length):
+        import_record(self.h5_path)
+
+    def time_import_lazy(self, length):
+        import_record(self.h5_path, lazy=True).close()
+
+    def time_import_mmap(self, length):
+        import_record_mmap(self.mmap_dir)
+
+    def peakmem_import(self, length):
+        import_record(self.h5_path)
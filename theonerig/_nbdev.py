@@ -3,11 +3,22 @@
 __all__ = ["index", "modules", "custom_doc_links", "git_url"]
 
 index = {"DataChunk": "00_core.ipynb",
+         "LazyDataChunk": "00_core.ipynb",
+         "H5DataChunk": "00_core.ipynb",
+         "SparseDataChunk": "00_core.ipynb",
+         "EventDataChunk": "00_core.ipynb",
+         "StreamDataChunk": "00_core.ipynb",
+         "TimepointDataChunk": "00_core.ipynb",
+         "TimeIndex": "00_core.ipynb",
          "ContiguousRecord": "00_core.ipynb",
          "RecordMaster": "00_core.ipynb",
          "Data_Pipe": "00_core.ipynb",
          "export_record": "00_core.ipynb",
          "import_record": "00_core.ipynb",
+         "export_record_mmap": "00_core.ipynb",
+         "import_record_mmap": "00_core.ipynb",
+         "SharedRecord": "00_core.ipynb",
+         "attach_shared": "00_core.ipynb",
          "extend_sync_timepoints": "01_utils.ipynb",
          "align_sync_timepoints": "01_utils.ipynb",
          "resample_to_timepoints": "01_utils.ipynb",
@@ -123,6 +134,10 @@ index = {"DataChunk": "00_core.ipynb",
          "split_eye_events": "06_eyetrack.ipynb",
          "get_spherical_map": "06_eyetrack.ipynb",
          "apply_spherical_map": "06_eyetrack.ipynb",
+         "storage_dtype": "07_config.ipynb",
+         "compact_dtype": "07_config.ipynb",
+         "resolve_dtype": "07_config.ipynb",
+         "as_storage_dtype": "07_config.ipynb",
          "atoi": "10_synchro.io.ipynb",
          "natural_keys": "10_synchro.io.ipynb",
          "filter_per_extension": "10_synchro.io.ipynb",
@@ -193,7 +208,8 @@ index = {"DataChunk": "00_core.ipynb",
          "append_tread_movement": "14_synchro.nested_stims.ipynb",
          "append_to_reM": "14_synchro.nested_stims.ipynb",
          "master_loop": "14_synchro.nested_stims.ipynb",
-         "load_vivo_2p": "99_testdata.ipynb"}
+         "load_vivo_2p": "99_testdata.ipynb",
+         "synthetic_record": "99_testdata.ipynb"}
 
 modules = ["core.py",
            "utils.py",
@@ -202,6 +218,7 @@ modules = ["core.py",
            "plotting.py",
            "database.py",
            "eyetrack.py",
+           "config.py",
            "synchro/io.py",
            "synchro/extracting.py",
            "synchro/processing.py",
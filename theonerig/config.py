@@ -0,0 +1,99 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: 07_config.ipynb (unless otherwise specified).
+
+__all__ = ['storage_dtype', 'compact_dtype', 'resolve_dtype', 'as_storage_dtype']
+
+# Cell
+import numpy as np
+
+# Cell
+storage_dtype = {"stim":    "compact",
+                 "counts":  np.uint16,
+                 "calcium": np.float32}
+
+_COMPACT_DTYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]
+
+# Cell
+_BLOCK_SIZE = 2**20 #Number of values checked at once by _value_range
+
+def _value_range(data) -> tuple:
+    """Returns the (min, max, integer) of data, integer telling if all values are integers, or None if data
+    is empty. Float values are checked by blocks, without temporaries of the size of data."""
+    data = np.atleast_1d(np.asarray(data))
+    if data.size == 0:
+        return None
+    lo, hi = np.min(data), np.max(data)
+    if np.issubdtype(data.dtype, np.integer) or np.issubdtype(data.dtype, np.bool_):
+        return lo, hi, True
+    if not np.isfinite(lo) or not np.isfinite(hi): #nan and inf propagate to the min or the max
+        return lo, hi, False
+    rows = max(_BLOCK_SIZE//max(data[0].size, 1), 1)
+    integer = all(np.all(np.mod(data[i:i+rows], 1)==0) for i in range(0, len(data), rows))
+    return lo, hi, integer
+
+def _fits(data, dtype, value_range=None) -> bool:
+    """Returns True if the values of data are exactly representable with the integer dtype.
+    value_range is the result of _value_range(data), if already computed."""
+    if value_range is None:
+        value_range = _value_range(data)
+    if value_range is None:
+        return True
+    lo, hi, integer = value_range
+    info = np.iinfo(dtype)
+    return integer and info.min <= lo and hi <= info.max
+
+def compact_dtype(data) -> np.dtype:
+    """
+    Smallest integer dtype that holds exactly the values of data.
+
+    params:
+        - data: Array of values
+
+    return:
+        - The compact dtype, or the dtype of data if the values are not integers
+    """
+    data = np.asarray(data)
+    value_range = _value_range(data) #Computed once for all the candidate dtypes
+    for dtype in _COMPACT_DTYPES:
+        if _fits(data, dtype, value_range):
+            return np.dtype(dtype)
+    return data.dtype
+
+def resolve_dtype(data, kind:str, dtype=None) -> np.dtype:
+    """
+    Resolves the dtype used to store data of a given kind, from the `dtype` parameter if given, or else from
+    `storage_dtype`. An integer dtype that can't hold the values falls back on the dtype of data.
+
+    params:
+        - data: Array of values (or of the extreme values) to store
+        - kind: Key of `storage_dtype` ("stim", "counts", "calcium")
+        - dtype: Per call override. A numpy dtype, "compact" or None to follow `storage_dtype`
+
+    return:
+        - The dtype to store the data
+    """
+    data = np.asarray(data)
+    if dtype is None:
+        dtype = storage_dtype.get(kind)
+    if dtype is None:
+        return data.dtype
+    if isinstance(dtype, str) and dtype == "compact":
+        return compact_dtype(data)
+    dtype = np.dtype(dtype)
+    if np.issubdtype(dtype, np.integer) and not _fits(data, dtype):
+        return data.dtype
+    return dtype
+
+def as_storage_dtype(data, kind:str, dtype=None) -> np.ndarray:
+    """
+    Casts data to its storage dtype (see `resolve_dtype`). No copy is made if the dtype is unchanged.
+
+    params:
+        - data: Array to cast
+        - kind: Key of `storage_dtype` ("stim", "counts", "calcium")
+        - dtype: Per call override of `storage_dtype`
+
+    return:
+        - The casted array
+    """
+    data = np.asarray(data)
+    return data.astype(resolve_dtype(data, kind, dtype), copy=False)
\ No newline at end of file
@@ -1,17 +1,30 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 00_core.ipynb (unless otherwise specified).
 
-__all__ = ['DataChunk', 'ContiguousRecord', 'RecordMaster', 'Data_Pipe', 'export_record', 'import_record']
+__all__ = ['DataChunk', 'LazyDataChunk', 'H5DataChunk', 'SparseDataChunk', 'EventDataChunk', 'StreamDataChunk',
+           'TimepointDataChunk', 'TimeIndex', 'ContiguousRecord', 'RecordMaster', 'Data_Pipe', 'export_record',
+           'import_record', 'export_record_mmap', 'import_record_mmap', 'SharedRecord', 'attach_shared']
 
 # Cell
 import h5py
-import json, re
+import json, re, os, sys, zlib, hashlib
+import contextlib
 import numpy as np
-from collections import namedtuple
+import pandas as pd
+import scipy.sparse as sparse
+import scipy.interpolate as interpolate
+from scipy.ndimage import convolve1d
+from collections import namedtuple, OrderedDict
 from typing import Dict, Tuple, Sequence, Union
 import itertools
+import bisect
+import threading, queue
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 from matplotlib.patches import Patch
 
+from .config import *
+
 class DataChunk(np.ndarray):
     """Base brick of data. Derived from np.ndarray
     params:
@@ -38,6 +51,14 @@ class DataChunk(np.ndarray):
         self.fill  = getattr(obj, 'fill', 0)
         self.attrs = getattr(obj, 'attrs', {})
 
+    def __reduce__(self):
+        #np.ndarray only pickles the data, the DataChunk attributes are added to its state
+        reconstruct, args, state = super().__reduce__()
+        return reconstruct, args, (state, (self.idx, self.group, self.fill, self.attrs))
+
+    def __setstate__(self, state):
+        array_state, (self.idx, self.group, self.fill, self.attrs) = state
+        super().__setstate__(array_state)
 
     @property
     def range(self):
@@ -56,6 +77,626 @@ class DataChunk(np.ndarray):
     def __repr__(self):
         return "DataChunk(%s,%s,%s,%s)"%(self.shape, self.idx, self.group, self.fill)
 
+    def fingerprint(self, refresh:bool=False) -> str:
+        """Stable hash of the data, idx, group, fill and attrs of the DataChunk, e.g. to use as a cache key.
+        The data is hashed blockwise once, and its hash is kept until the DataChunk is marked dirty in its
+        ContiguousRecord after an in-place modification (or refresh is True).
+
+        return:
+            - The hexadecimal digest of the DataChunk"""
+        return _fingerprint(self, self._data_digest(refresh))
+
+    def _data_digest(self, refresh:bool=False) -> bytes:
+        if refresh or getattr(self, "_digest", None) is None:
+            data = self.view(np.ndarray)
+            self._digest = _digest_frames(lambda start, stop: data[start:stop], self.shape, self.dtype)
+        return self._digest
+
+_HASH_BLOCK_BYTES = 2**22
+
+def _digest_frames(read, shape:tuple, dtype) -> bytes:
+    """blake2b digest of the shape, dtype and data of an array, read by blocks of frames of about
+    _HASH_BLOCK_BYTES with read(start, stop)"""
+    dtype       = np.dtype(dtype)
+    hasher      = hashlib.blake2b(repr((tuple(shape), dtype.str)).encode(), digest_size=16)
+    frame_bytes = max(int(np.prod(shape[1:], dtype=int))*dtype.itemsize, 1)
+    n_frames    = max(_HASH_BLOCK_BYTES//frame_bytes, 1)
+    for start in range(0, shape[0], n_frames):
+        block = np.asarray(read(start, min(start+n_frames, shape[0])))
+        if dtype.hasobject:
+            hasher.update(repr(block.tolist()).encode())
+        else:
+            hasher.update(np.ascontiguousarray(block).reshape(-1).view(np.uint8))
+    return hasher.digest()
+
+def _digest_arrays(kind:str, shape:tuple, dtype, arrays:dict) -> bytes:
+    """blake2b digest of the arrays of the compact representation of a LazyDataChunk with a kind"""
+    hasher = hashlib.blake2b(repr((kind, tuple(shape), np.dtype(dtype).str)).encode(), digest_size=16)
+    for array_k, array_v in sorted(arrays.items()):
+        hasher.update(_attr_bytes(array_k))
+        hasher.update(_attr_bytes(array_v))
+    return hasher.digest()
+
+def _attr_bytes(value) -> bytes:
+    """Stable encoding of an attribute of a DataChunk for its fingerprint"""
+    if isinstance(value, np.ndarray):
+        array = value.reshape(1) if value.ndim==0 else value
+        return _digest_frames(lambda start, stop: array[start:stop], array.shape, array.dtype)
+    return json.dumps(value, sort_keys=True,
+                      default=lambda v: v.item() if isinstance(v, np.generic) else repr(v)).encode()
+
+def _fingerprint(datachunk, data_digest:bytes) -> str:
+    """Combine the digest of the data of datachunk with its idx, group, fill and attrs"""
+    hasher = hashlib.blake2b(data_digest, digest_size=16)
+    hasher.update(_attr_bytes([datachunk.idx, datachunk.group, datachunk.fill]))
+    for attr_k in sorted(datachunk.attrs):
+        hasher.update(_attr_bytes(attr_k))
+        hasher.update(_attr_bytes(datachunk.attrs[attr_k]))
+    return hasher.hexdigest()
+
+# Cell
+_CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "nbytes", "max_bytes", "entries"])
+
+class _ByteLRU():
+    """Least recently used cache of arrays, bounded by the total size in bytes of the arrays it holds.
+    Safe to use from multiple threads."""
+    def __init__(self, max_bytes:int):
+        self.max_bytes = max_bytes
+        self.nbytes    = 0
+        self._items    = OrderedDict()
+        self._lock     = threading.RLock()
+        self.hits      = 0
+        self.misses    = 0
+
+    def get(self, key):
+        """Returns the array stored under key (and mark it as recently used), or None"""
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used arrays to stay under max_bytes"""
+        with self._lock:
+            self.pop(key)
+            if value.nbytes > self.max_bytes:
+                return
+            self._items[key] = value
+            self.nbytes     += value.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted   = self._items.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def pop(self, key):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self.nbytes -= value.nbytes
+            return value
+
+    def pop_if(self, predicate):
+        """Remove the arrays whose key satisfies predicate"""
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self.pop(key)
+
+    def nbytes_if(self, predicate) -> int:
+        """Size of the arrays whose key satisfies predicate"""
+        with self._lock:
+            return sum(value.nbytes for key, value in self._items.items() if predicate(key))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def info(self) -> _CacheInfo:
+        return _CacheInfo(self.hits, self.misses, self.nbytes, self.max_bytes, len(self._items))
+
+    def __getstate__(self):
+        #Locks can't be pickled, and the arrays cached are not sent along with the records
+        state = dict(self.__dict__)
+        del state["_lock"]
+        state["_items"], state["nbytes"] = OrderedDict(), 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._items)
+
+class LazyDataChunk():
+    """Base class of the DataChunks that don't hold their data in memory, but read it when indexed.
+    They have the idx, group, fill and attrs of a DataChunk, and can be stored in a ContiguousRecord.
+    Indexing them along the time axis returns a np.ndarray.
+
+    Subclasses implement `_read(start, stop)`, returning the data of the frames [start, stop) of the chunk.
+    Those with a compact representation set `_kind` and implement `_arrays()` and `_from_arrays(...)`,
+    so export_record and export_record_mmap save that representation instead of the dense data.
+    Those that set `_dense_reads` are read into a DataChunk by the ContiguousRecord, as their dense data is
+    expected by most code, while the others are returned as lazy slices by `_slice_chunk`.
+    params:
+        - shape: Shape of the data (time, ...)
+        - dtype: dtype of the data
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value."""
+    def __init__(self, shape, dtype, idx, group, fill=0):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.idx   = idx
+        self.group = group
+        self.fill  = fill
+        self.attrs = {}
+
+    _kind        = None
+    _dense_reads = False
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        raise NotImplementedError
+
+    def _slice_chunk(self, start:int, stop:int):
+        """Returns a DataChunk of the frames [start, stop) of the chunk"""
+        return DataChunk(self._read(start, stop), self.idx+start, self.group, self.fill)
+
+    def _arrays(self) -> dict:
+        """Returns the arrays of the compact representation of the DataChunk, by name"""
+        raise NotImplementedError
+
+    @classmethod
+    def _from_arrays(cls, arrays:dict, shape:tuple, idx:int, group:str, fill=0):
+        """Build the DataChunk back from the arrays returned by `_arrays()`"""
+        raise NotImplementedError
+
+    def fingerprint(self, refresh:bool=False) -> str:
+        """Stable hash of the data, idx, group, fill and attrs of the DataChunk (see DataChunk.fingerprint).
+        DataChunks with a kind hash the arrays of their compact representation instead of the dense data."""
+        return _fingerprint(self, self._data_digest(refresh))
+
+    def _data_digest(self, refresh:bool=False) -> bytes:
+        if refresh or getattr(self, "_digest", None) is None:
+            if self._kind is None:
+                self._digest = _digest_frames(self._read, self.shape, self.dtype)
+            else:
+                self._digest = _digest_arrays(self._kind, self.shape, self.dtype, self._arrays())
+        return self._digest
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape))*self.dtype.itemsize
+
+    @property
+    def range(self):
+        return range(self.idx, self.idx + len(self))
+
+    @property
+    def slice(self):
+        return slice(self.idx, self.idx + len(self))
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        t_key, other_keys = key[0], key[1:]
+        if isinstance(t_key, slice) and (t_key.step is None or t_key.step > 0):
+            start, stop, step = t_key.indices(len(self))
+            data = self._read(start, max(start, stop))[::step]
+        elif isinstance(t_key, (int, np.integer)):
+            if t_key < 0:
+                t_key += len(self)
+            if not 0 <= t_key < len(self):
+                raise IndexError("index %d is out of bounds for axis 0 with size %d"%(t_key, len(self)))
+            data = self._read(t_key, t_key+1)[0]
+        else:
+            data = np.asarray(self)[t_key]
+        return data[other_keys] if len(other_keys)>0 else data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self._read(0, len(self))
+        if copy or dtype is not None:
+            data = np.array(data, dtype=dtype)
+        return data
+
+    def __repr__(self):
+        return "%s(%s,%s,%s,%s)"%(type(self).__name__, self.shape, self.idx, self.group, self.fill)
+
+class H5DataChunk(LazyDataChunk):
+    """DataChunk reading its data from a dataset of an h5 file saved by export_record (see import_record
+    with lazy=True). The dataset is read by blocks of frames kept in a LRU cache, and the attributes are
+    decoded on first access.
+    params:
+        - dataset: h5py Dataset of the DataChunk
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value.
+        - cache: _ByteLRU shared by the H5DataChunks of a record for the decompressed blocks. None to disable.
+        - ndarray_group: h5py Group of the array attributes of the DataChunk"""
+    def __init__(self, dataset, idx, group, fill=0, cache=None, ndarray_group=None):
+        super().__init__(dataset.shape, dataset.dtype, idx, group, fill)
+        self._cache         = cache
+        self._attrs         = None
+        self._bind(dataset, ndarray_group)
+
+    def _bind(self, dataset, ndarray_group=None):
+        """Read the data from dataset, e.g. after its file was reopened or the dataset rewritten"""
+        self._dataset       = dataset
+        self._ndarray_group = ndarray_group
+        if dataset.chunks is not None:
+            self._block_len = dataset.chunks[0] #Reading whole h5 chunks avoids decompressing them twice
+        else:
+            self._block_len = max(1, 2**20//max(1, self.nbytes//max(1, len(self))))
+        if self._cache is not None: #Blocks of a previous binding may have another length
+            self._cache.pop_if(lambda key: key[0]==dataset.name)
+
+    @property
+    def attrs(self):
+        if self._attrs is None:
+            self._attrs = _read_h5_attrs(self._dataset, self._ndarray_group)
+        return self._attrs
+
+    @attrs.setter
+    def attrs(self, value):
+        self._attrs = value
+
+    def _block(self, i:int) -> np.ndarray:
+        key   = (self._dataset.name, i)
+        block = self._cache.get(key)
+        if block is None:
+            block = self._dataset[i*self._block_len:(i+1)*self._block_len]
+            block.flags.writeable = False #Blocks are shared with the readers
+            self._cache.put(key, block)
+        return block
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        if self._cache is None or stop <= start:
+            return self._dataset[start:stop]
+        first, last = start//self._block_len, (stop-1)//self._block_len
+        if first == last:
+            offset = first*self._block_len
+            return self._block(first)[start-offset:stop-offset]
+        data = np.empty((stop-start, *self.shape[1:]), dtype=self.dtype)
+        for i in range(first, last+1):
+            offset = i*self._block_len
+            b_start, b_stop = max(start, offset), min(stop, offset+self._block_len)
+            data[b_start-start:b_stop-start] = self._block(i)[b_start-offset:b_stop-offset]
+        return data
+
+# Cell
+class SparseDataChunk(LazyDataChunk):
+    """DataChunk of a scipy.sparse CSR matrix of shape (t, n), for mostly empty data such as spike counts.
+    The ContiguousRecord stores it and slices it in time without densifying it, and np.sum works on it
+    directly. Other indexing and numpy functions give dense arrays.
+    params:
+        - data: Array or scipy.sparse matrix of shape (t, n)
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value. Sequences made of multiple SparseDataChunk stay sparse if it is 0."""
+    _kind = "sparse"
+
+    def __init__(self, data, idx, group, fill=0):
+        if np.ndim(data) != 2:
+            raise ValueError("SparseDataChunk data must be of shape (t, n)")
+        self.sparse = sparse.csr_matrix(data)
+        super().__init__(self.sparse.shape, self.sparse.dtype, idx, group, fill)
+
+    @property
+    def nbytes(self):
+        return self.sparse.data.nbytes + self.sparse.indices.nbytes + self.sparse.indptr.nbytes
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        return self.sparse[start:stop].toarray()
+
+    def _slice_chunk(self, start:int, stop:int):
+        return SparseDataChunk(self.sparse[start:stop], self.idx+start, self.group, self.fill)
+
+    def sum(self, axis=None, dtype=None, out=None, **kwargs):
+        res = np.asarray(self.sparse.sum(axis=axis, dtype=dtype))
+        res = res.ravel() if axis is not None else res[()]
+        if out is not None:
+            out[...] = res
+            return out
+        return res
+
+    def _arrays(self) -> dict:
+        return {"data": self.sparse.data, "indices": self.sparse.indices, "indptr": self.sparse.indptr}
+
+    @classmethod
+    def _from_arrays(cls, arrays:dict, shape:tuple, idx:int, group:str, fill=0):
+        data = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=shape)
+        return cls(data, idx, group, fill)
+
+    @staticmethod
+    def _concatenate(datachunks:list, start:int, stop:int):
+        """Returns the SparseDataChunk of the frames [start, stop) covered by the sorted datachunks,
+        with zeros in between"""
+        n, dtype = datachunks[0].shape[1], datachunks[0].dtype
+        pieces, cursor = [], start
+        for datachunk in datachunks:
+            dc_start = max(datachunk.idx, start)
+            dc_stop  = min(datachunk.idx+len(datachunk), stop)
+            if dc_start > cursor:
+                pieces.append(sparse.csr_matrix((dc_start-cursor, n), dtype=dtype))
+            pieces.append(datachunk.sparse[dc_start-datachunk.idx:dc_stop-datachunk.idx])
+            cursor = dc_stop
+        if stop > cursor:
+            pieces.append(sparse.csr_matrix((stop-cursor, n), dtype=dtype))
+        return SparseDataChunk(sparse.vstack(pieces, format="csr"), start, datachunks[0].group, 0)
+
+class EventDataChunk(LazyDataChunk):
+    """DataChunk of events, such as spike times, kept as timestamps in samples of the main device and binned
+    when read. The timestamps of the n columns (cells) are stored concatenated, sorted within each column, with
+    the offsets of the columns. Indexing it gives the counts of shape (t, n) on the frame edges, like
+    spike_to_dataChunk, and `rebin` counts them in bins of any multiple or fraction of a frame.
+    params:
+        - timestamps: Concatenated timestamps of the columns, each sorted
+        - offsets: n+1 positions in timestamps where the columns start, the last being len(timestamps)
+        - edges: t+1 timepoints of the edges of the frames of the DataChunk (the main_tp, plus the end of the
+                 last frame). Bins include their left edge, and the last one its right edge too.
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value.
+        - dtype: dtype of the counts. Defaults to config.storage_dtype["counts"]"""
+    _kind = "events"
+
+    def __init__(self, timestamps, offsets, edges, idx, group, fill=0, dtype=None):
+        self.timestamps = np.asarray(timestamps)
+        self.offsets    = np.asarray(offsets, dtype=np.int64)
+        self.edges      = np.asarray(edges)
+        max_count = np.max(np.diff(self.offsets), initial=0)
+        super().__init__((len(self.edges)-1, len(self.offsets)-1),
+                         resolve_dtype(np.array([0, max_count]), "counts", dtype), idx, group, fill)
+        self._rebinned = {} #Counts per bin size, see rebin
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.offsets.nbytes + self.edges.nbytes
+
+    def _column(self, i:int) -> np.ndarray:
+        return self.timestamps[self.offsets[i]:self.offsets[i+1]]
+
+    def _count(self, edges:np.ndarray, closed:bool) -> np.ndarray:
+        """Counts of the events of each column between the edges. closed includes the last edge in the last bin"""
+        res = np.empty((max(len(edges)-1, 0), self.shape[1]), dtype=self.dtype)
+        for i in range(self.shape[1]):
+            pos = np.searchsorted(self._column(i), edges, side="left")
+            if closed and len(edges)>0:
+                pos[-1] = np.searchsorted(self._column(i), edges[-1], side="right")
+            res[:, i] = np.diff(pos)
+        return res
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        return self._count(self.edges[start:stop+1], closed=stop==len(self))
+
+    def _slice_chunk(self, start:int, stop:int):
+        side    = "right" if stop==len(self) else "left"
+        columns = []
+        for i in range(self.shape[1]):
+            column = self._column(i)
+            columns.append(column[np.searchsorted(column, self.edges[start]):
+                                  np.searchsorted(column, self.edges[stop], side=side)])
+        offsets = np.cumsum([0]+[len(column) for column in columns])
+        return EventDataChunk(np.concatenate([self.timestamps[:0]]+columns), offsets, self.edges[start:stop+1],
+                              self.idx+start, self.group, self.fill, self.dtype)
+
+    def bin_edges(self, bin_size:float=1) -> np.ndarray:
+        """Timepoints of the edges of bins of bin_size frames, interpolated between the frame edges"""
+        positions = np.append(np.arange(0, len(self), bin_size), len(self))
+        return np.interp(positions, np.arange(len(self)+1), self.edges)
+
+    def rebin(self, bin_size:float=1) -> np.ndarray:
+        """
+        Counts the events in bins of bin_size frames.
+
+        params:
+            - bin_size: Number of frames per bin. 1 gives the frame counts, 5 sums them by five and .25 splits
+                        each frame in four. The last bin is shorter when bin_size doesn't divide the length.
+        return:
+            - Read-only counts of shape (ceil(t/bin_size), n), cached per bin_size
+        """
+        if bin_size not in self._rebinned:
+            counts = self._count(self.bin_edges(bin_size), closed=True)
+            counts.flags.writeable = False
+            self._rebinned[bin_size] = counts
+        return self._rebinned[bin_size]
+
+    def _arrays(self) -> dict:
+        return {"timestamps": self.timestamps, "offsets": self.offsets, "edges": self.edges}
+
+    @classmethod
+    def _from_arrays(cls, arrays:dict, shape:tuple, idx:int, group:str, fill=0):
+        return cls(arrays["timestamps"], arrays["offsets"], arrays["edges"], idx, group, fill)
+
+class StreamDataChunk(LazyDataChunk):
+    """DataChunk of a stream sampled at its own rate (eye tracking camera, treadmill, two photon frames), kept
+    with the timepoints of its samples and resampled onto the frames when read. Only the samples around the
+    requested frames are smoothed and interpolated, and the last results are memoized.
+
+    The resampling follows attrs["interpolation"], a kind of scipy.interpolate.interp1d ("linear" by default,
+    "nearest", "previous", "cubic", ...), and attrs["smoothing"]: "auto" (default) averages the samples over a
+    frame when the stream is faster than the frames (as resample_to_timepoints), "none" disables it. Both can
+    be changed at any time, and are saved with the other attrs.
+    params:
+        - samples: Samples of the stream, of shape (n, ...)
+        - timepoints: Timepoints of the n samples, in samples of the main device
+        - frame_tp: Timepoints of the t frames of the DataChunk, within the range of timepoints
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value.
+        - memo_bytes: Size of the memo of the resampled windows"""
+    _kind        = "stream"
+    _dense_reads = True
+
+    def __init__(self, samples, timepoints, frame_tp, idx, group, fill=0, memo_bytes=2**24):
+        self.samples    = np.asarray(samples)
+        self.timepoints = np.asarray(timepoints)
+        self.frame_tp   = np.asarray(frame_tp)
+        if len(self.samples) != len(self.timepoints):
+            raise ValueError("samples and timepoints must have the same length")
+        dtype = self.samples.dtype if np.issubdtype(self.samples.dtype, np.floating) else np.float64
+        super().__init__((len(self.frame_tp), *self.samples.shape[1:]), dtype, idx, group, fill)
+        self._memo = _ByteLRU(memo_bytes)
+        #Number of samples per frame, the width of the smoothing
+        self._distance = 1
+        if len(self.frame_tp)>1:
+            self._distance = max(int(np.diff(np.searchsorted(self.timepoints, self.frame_tp[:2]))[0]), 1)
+
+    @property
+    def nbytes(self):
+        return self.samples.nbytes + self.timepoints.nbytes + self.frame_tp.nbytes
+
+    def _window(self, start:int, stop:int) -> tuple:
+        """Range of the samples needed to resample the frames [start, stop)"""
+        margin = self._distance+2
+        lo = np.searchsorted(self.timepoints, self.frame_tp[start], side="right")-1-margin
+        hi = np.searchsorted(self.timepoints, self.frame_tp[stop-1], side="left")+1+margin
+        return max(lo, 0), min(hi, len(self.timepoints))
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        if stop<=start:
+            return np.empty((0, *self.shape[1:]), dtype=self.dtype)
+        interpolation = self.attrs.get("interpolation", "linear")
+        smoothing     = self.attrs.get("smoothing", "auto")
+        key = (start, stop, interpolation, smoothing)
+        res = self._memo.get(key)
+        if res is None:
+            lo, hi  = self._window(start, stop)
+            samples = self.samples[lo:hi]
+            if smoothing=="auto" and self._distance>1:
+                samples = convolve1d(samples.astype(self.dtype), np.ones(self._distance)/self._distance, axis=0)
+            res = interpolate.interp1d(self.timepoints[lo:hi], samples, axis=0, kind=interpolation,
+                                       assume_sorted=True)(self.frame_tp[start:stop]).astype(self.dtype)
+            res.flags.writeable = False #The memo returns the same array to the next callers
+            self._memo.put(key, res)
+        return res
+
+    def _slice_chunk(self, start:int, stop:int):
+        lo, hi = self._window(start, stop) if stop>start else (0, 0)
+        return StreamDataChunk(self.samples[lo:hi], self.timepoints[lo:hi], self.frame_tp[start:stop],
+                               self.idx+start, self.group, self.fill, self._memo.max_bytes)
+
+    def _arrays(self) -> dict:
+        return {"samples": self.samples, "timepoints": self.timepoints, "frame_tp": self.frame_tp}
+
+    @classmethod
+    def _from_arrays(cls, arrays:dict, shape:tuple, idx:int, group:str, fill=0):
+        return cls(arrays["samples"], arrays["timepoints"], arrays["frame_tp"], idx, group, fill)
+
+class TimepointDataChunk(LazyDataChunk):
+    """DataChunk of near-arithmetic timepoints, such as the main_tp of a record, delta encoded. The timepoints
+    are stored as their first value, their nominal step (averaged between the first and last timepoints) and
+    their integer residuals from that arithmetic sequence, in the smallest dtype holding them (none at all
+    for a regular sequence). They are expanded with arithmetic when read.
+    params:
+        - timepoints: 1D array of timepoints, with integer values
+        - idx: Index of the start of the DataChunk in the record.
+        - group: group of the DataChunk in {stim, sync, cell, data}
+        - fill: Default filling value."""
+    _kind        = "timepoints"
+    _dense_reads = True
+
+    def __init__(self, timepoints, idx, group, fill=0):
+        timepoints = np.asarray(timepoints)
+        if timepoints.ndim != 1:
+            raise ValueError("TimepointDataChunk timepoints must be a 1D array")
+        n     = len(timepoints)
+        start = int(timepoints[0]) if n>0 else 0
+        step  = float(timepoints[-1]-timepoints[0])/(n-1) if n>1 else 0.
+        residuals = timepoints - (start + np.rint(np.arange(n)*step).astype(np.int64))
+        dtype     = compact_dtype(residuals)
+        if not np.issubdtype(dtype, np.integer):
+            raise ValueError("TimepointDataChunk timepoints must have integer values")
+        self._encode(np.array([start, 0], dtype=timepoints.dtype), step, residuals.astype(dtype))
+        super().__init__((n,), timepoints.dtype, idx, group, fill)
+
+    def _encode(self, anchor:np.ndarray, step:float, residuals:np.ndarray):
+        """Set the encoding. anchor holds the first value of the arithmetic sequence and the position in it
+        of the first timepoint (a slice keeps the sequence of its DataChunk), in the dtype of the timepoints"""
+        self.anchor    = anchor
+        self.step      = float(step)
+        self.residuals = residuals if residuals.any() else residuals[:0]
+
+    @property
+    def nbytes(self):
+        return self.anchor.nbytes + 8 + self.residuals.nbytes
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        stop  = max(start, stop)
+        first = int(self.anchor[1])
+        data  = int(self.anchor[0]) + np.rint(np.arange(first+start, first+stop)*self.step).astype(np.int64)
+        if len(self.residuals)>0:
+            data += self.residuals[start:stop]
+        return data.astype(self.dtype, copy=False)
+
+    def _slice_chunk(self, start:int, stop:int):
+        stop  = max(start, stop)
+        chunk = TimepointDataChunk.__new__(TimepointDataChunk)
+        chunk._encode(self.anchor+np.array([0, start], dtype=self.dtype), self.step, self.residuals[start:stop])
+        LazyDataChunk.__init__(chunk, (stop-start,), self.dtype, self.idx+start, self.group, self.fill)
+        return chunk
+
+    def _arrays(self) -> dict:
+        return {"anchor": self.anchor, "step": np.array([self.step]), "residuals": self.residuals}
+
+    @classmethod
+    def _from_arrays(cls, arrays:dict, shape:tuple, idx:int, group:str, fill=0):
+        chunk = cls.__new__(cls)
+        chunk._encode(np.asarray(arrays["anchor"]), arrays["step"][0], np.asarray(arrays["residuals"]))
+        LazyDataChunk.__init__(chunk, tuple(shape), chunk.anchor.dtype, idx, group, fill)
+        return chunk
+
+_CHUNK_KINDS = {"sparse": SparseDataChunk, "events": EventDataChunk, "stream": StreamDataChunk,
+                "timepoints": TimepointDataChunk} #LazyDataChunk saved by kind by the exports
+
+# Cell
+class TimeIndex():
+    """Conversions between the samples of the main acquisition device, the frames of a record and seconds.
+    The timepoints being sorted, samples are matched to frames with binary searches, for arrays of queries.
+
+    params:
+        - timepoints: Sample of the main device at which each frame starts (the "main_tp" of a record)
+        - frame_rate: Frame rate in Hz
+        - idx: Frame of the first timepoint
+    """
+    def __init__(self, timepoints, frame_rate=60, idx=0):
+        self.timepoints = np.asarray(timepoints)
+        self.frame_rate = frame_rate
+        self.idx        = idx
+
+    def sample_to_frame(self, samples, side="right"):
+        """Returns the frames starting after the samples (side="right"), or at or after them (side="left"),
+        like np.searchsorted. The frame during which a sample happened is thus sample_to_frame(sample)-1.
+        Samples after the last timepoint give len(timepoints)+idx."""
+        return np.searchsorted(self.timepoints, samples, side=side) + self.idx
+
+    def frame_to_sample(self, frames):
+        """Returns the samples at which the frames start"""
+        return self.timepoints[np.asarray(frames) - self.idx]
+
+    def frame_to_seconds(self, frames):
+        """Returns the time in seconds of the frames from the start of the record"""
+        return np.asarray(frames) / self.frame_rate
+
+    def seconds_to_frame(self, seconds):
+        """Returns the frames displayed at the given times in seconds from the start of the record"""
+        return np.floor(np.asarray(seconds) * self.frame_rate + 1e-9).astype(int) #1e-9: float errors at frame starts
+
+    def __len__(self):
+        return len(self.timepoints)
+
+    def __repr__(self):
+        return "TimeIndex(%d frames, %s Hz, %d)"%(len(self), self.frame_rate, self.idx)
+
 # Cell
 class ContiguousRecord():
     """Representation of a contiguous recording session to store DataChunk
@@ -84,6 +725,11 @@ class ContiguousRecord():
         self.length = length
         self._frame_time = 1/frame_rate
         self._data_dict = {}
+        self._starts    = {} #Interval index: sorted starting indexes of the DataChunks of each name
+        self._cache     = None #_ByteLRU of the assembled sequences, see enable_cache
+        self._dirty     = set() #(name, idx) of the DataChunks set since the last export or import
+        self._deleted   = set() #Names deleted since the last export or import
+        self._time_index = None
 
         self[self.SIGNALS] = signals
         self[self.MAIN_TP] = main_tp
@@ -92,11 +738,36 @@ class ContiguousRecord():
 
     def dataset_intersect(self, existing_datachunk:list, new_datachunk:DataChunk):
         """Check for timepoint intersections of two DataChunks"""
-        range_new = set(new_datachunk.range)
-        intersect = False
-        for range_existing in existing_datachunk:
-            intersect |= len(range_new.intersection(range_existing.range)) > 0
-        return intersect
+        if len(new_datachunk)==0:
+            return False
+        start, stop = new_datachunk.idx, new_datachunk.idx+len(new_datachunk)
+        for dchunk in existing_datachunk:
+            if len(dchunk)>0 and dchunk.idx < stop and start < dchunk.idx+len(dchunk):
+                return True
+        return False
+
+    def _overlap_range(self, datachunk_name:str, start:int, stop:int):
+        """Returns the bounds (i, j) of the DataChunks of datachunk_name overlapping the frames [start, stop).
+        Uses the interval index of the name, so the lookup is done in O(log n)."""
+        starts   = self._starts[datachunk_name]
+        l_dchunk = self._data_dict[datachunk_name]
+        i = bisect.bisect_right(starts, start)
+        k = i-1
+        while k>=0 and len(l_dchunk[k])==0: #Empty DataChunks don't cover anything
+            k -= 1
+        if k>=0 and l_dchunk[k].idx+len(l_dchunk[k]) > start:
+            i = k
+        j = bisect.bisect_left(starts, stop, lo=i)
+        return i, j
+
+    def get_chunks(self, datachunk_name:str, start:int=0, stop:int=None) -> list:
+        """Returns the DataChunks of the given name covering part of the frames [start, stop)"""
+        if datachunk_name not in self._data_dict.keys():
+            return []
+        if stop is None:
+            stop = self.length
+        i, j = self._overlap_range(datachunk_name, start, stop)
+        return [dchunk for dchunk in self._data_dict[datachunk_name][i:j] if len(dchunk)>0]
 
     def keys(self):
         """Retrieves the existing keyys inside this ContiguousRecord"""
@@ -110,7 +781,8 @@ class ContiguousRecord():
             return []
 
     def set_slice(self, slice_):
-        """Set the slice to restrict the size of the DataChunk returned"""
+        """Set the slice to restrict the size of the DataChunk returned. With a step, every step-th frame
+        of the slice is returned, as strided views when possible."""
         if slice_ is None:
             self._slice = slice(0,self.length,1)
         else:
@@ -121,11 +793,9 @@ class ContiguousRecord():
                 stop = self.length
             if step is None:
                 step = 1
-            if step!=1:
-                print("Step in slice is currently not supported.")
-                self._slice = slice(0,self.length,1)
-            else:
-                self._slice = slice(start,stop,step)
+            if step<1:
+                raise ValueError("The step of the slice must be positive")
+            self._slice = slice(start,stop,step)
 
 
     def get_names_group(self, group_name:str) -> list:
@@ -135,8 +805,16 @@ class ContiguousRecord():
                 names.append(key)
         return names
 
+    @property
+    def time_index(self) -> TimeIndex:
+        """TimeIndex of the frames of the record, built on its main_tp"""
+        if self._time_index is None:
+            self._time_index = TimeIndex(np.asarray(self.get(self.MAIN_TP, slice(0, self.length))),
+                                         frame_rate=1/self._frame_time)
+        return self._time_index
+
     def to_s(self, n_frame):
-        return round(self._frame_time*n_frame,2)
+        return np.round(np.asarray(n_frame)*self._frame_time, 2) #Without the time_index, which reads the main_tp
 
     def to_time_str(self, n_frame):
         s = int(self.to_s(n_frame))
@@ -151,40 +829,134 @@ class ContiguousRecord():
         if isinstance(key, str):
             if key not in self._data_dict.keys():
                 self._data_dict[key] = []
+                self._starts[key]    = []
 
-            if not self.dataset_intersect(self._data_dict[key], value):
-                self._data_dict[key].append(value)
-            else:
+            start, stop = value.idx, value.idx+len(value)
+            i, j = self._overlap_range(key, start, stop)
+            if len(value)>0 and any(len(dchunk)>0 for dchunk in self._data_dict[key][i:j]):
                 raise ValueError("Data with the same name already exists and intersect with the one provided")
+            pos = bisect.bisect_right(self._starts[key], start)
+            self._data_dict[key].insert(pos, value)
+            self._starts[key].insert(pos, start)
+            self._dirty.add((key, value.idx))
+            self._invalidate(key)
         else:
             raise KeyError("Cannot set data with an integer index, it needs a name")
 
-    def __getitem__(self, key):
-        if isinstance(key, str):
-            l_datachunk = self._data_dict[key]
-            fill_value  = l_datachunk[0].fill
-            shape       = l_datachunk[0].shape
-
-            full_sequence = DataChunk(np.zeros((len(range(*self._slice.indices(self.length))), *shape[1:]),
-                                               dtype=l_datachunk[0].dtype)+fill_value,
-                                      self._slice.start if self._slice.start is not None else 0,
-                                      fill_value)
-            for datachunk in l_datachunk:
-                dc_slice = datachunk.slice
-                if dc_slice.start>=self._slice.stop or dc_slice.stop<=self._slice.start:
-                    continue
+    def _view(self, datachunk:DataChunk, start:int, stop:int, step:int=1) -> DataChunk:
+        """Returns a read-only view of datachunk restricted to the frames [start, stop), every step frames.
+        A LazyDataChunk stays lazy without step, unless it has _dense_reads, and is read otherwise."""
+        if isinstance(datachunk, LazyDataChunk) and step==1 and not datachunk._dense_reads:
+            view = datachunk._slice_chunk(start-datachunk.idx, stop-datachunk.idx)
+        elif isinstance(datachunk, LazyDataChunk):
+            view = DataChunk(datachunk[start-datachunk.idx:stop-datachunk.idx:step], start,
+                             datachunk.group, datachunk.fill)
+        else:
+            view = datachunk[start-datachunk.idx:stop-datachunk.idx:step]
+        view.idx   = start
+        view.attrs = dict(datachunk.attrs)
+        if isinstance(view, np.ndarray):
+            view.flags.writeable = False
+        return view
+
+    def _slice_bounds(self, slice_) -> tuple:
+        """Returns the (start, stop, step) frames of slice_, or of the current slice if slice_ is None"""
+        if slice_ is None:
+            slice_ = self._slice
+        start, stop, step = slice_.indices(self.length)
+        if step<1:
+            raise ValueError("The step of the slice must be positive")
+        return start, max(start, stop), step
+
+    @staticmethod
+    def _first_frame(frame:int, start:int, step:int) -> int:
+        """First frame of the grid start+k*step at or after frame"""
+        return start + -(-(frame-start)//step)*step
+
+    def get_pieces(self, datachunk_name:str, slice_:slice=None) -> list:
+        """Returns the parts of the DataChunks of the given name covered by slice_ (defaults to the
+        current slice), as read-only views. Unlike indexing the ContiguousRecord, the gaps are not filled."""
+        start, stop, step = self._slice_bounds(slice_)
+        pieces = []
+        for dc in self.get_chunks(datachunk_name, start, stop):
+            first, dc_stop = self._first_frame(max(dc.idx, start), start, step), min(dc.idx+len(dc), stop)
+            if first < dc_stop:
+                pieces.append(self._view(dc, first, dc_stop, step))
+        return pieces
+
+    def get(self, datachunk_name:str, slice_:slice=None) -> DataChunk:
+        """Returns the data of the given name over the frames of slice_, like indexing the record
+        after a set_slice, but without modifying the record. Concurrent calls are thus safe.
+
+        params:
+            - datachunk_name: Name of the DataChunks
+            - slice_: Frames to retrieve. Defaults to the current slice (see set_slice).
+        return:
+            - A DataChunk starting at the first frame of the slice, with every step-th frame of the slice.
+              The gaps between the DataChunks are set to their fill value. It is a read-only view on the
+              DataChunk when a single one covers the slice (copy it to modify it), and a new array otherwise."""
+        l_datachunk = self._data_dict[datachunk_name]
+        start, stop, step = self._slice_bounds(slice_)
+        covering    = self.get_chunks(datachunk_name, start, stop)
+        single      = len(covering)==1 and covering[0].idx<=start and covering[0].idx+len(covering[0])>=stop
+        if single and not isinstance(covering[0], LazyDataChunk):
+            #A single DataChunk covers the slice, no need to fill and copy
+            return self._view(covering[0], start, stop, step)
+
+        if self._cache is not None:
+            cached = self._cache.get((datachunk_name, start, stop, step))
+            if cached is not None:
+                return cached
+            full_sequence = self._assemble(l_datachunk, covering, start, stop, single, step)
+            if isinstance(full_sequence, np.ndarray):
+                full_sequence.flags.writeable = False #The same array is returned to every caller
+            self._cache.put((datachunk_name, start, stop, step), full_sequence)
+            return full_sequence
+        return self._assemble(l_datachunk, covering, start, stop, single, step)
 
-                start = max(dc_slice.start, self._slice.start) #flooring to the maximum of both start
-                stop  = min(dc_slice.stop, self._slice.stop) # and capping to the min of both end
+    def _assemble(self, l_datachunk:list, covering:list, start:int, stop:int, single:bool, step:int=1) -> DataChunk:
+        """Build the DataChunk of the frames [start, stop), every step frames, from the covering DataChunks"""
+        if single:
+            return self._view(covering[0], start, stop, step)
 
-                new_dc_slice  = slice(start-datachunk.idx, stop-datachunk.idx)
-                res_start = self._slice.start if self._slice.start is not None else 0
-                res_slice = slice(start-res_start, stop-res_start)
-                full_sequence[res_slice] = datachunk.data[new_dc_slice]
-                full_sequence.attrs.update(datachunk.attrs)
+        fill_value  = l_datachunk[0].fill
+        shape       = l_datachunk[0].shape
 
+        if fill_value==0 and len(covering)>0 and all(isinstance(dc, SparseDataChunk) for dc in covering):
+            full_sequence = SparseDataChunk._concatenate(covering, start, stop)
+            if step>1:
+                full_sequence = SparseDataChunk(full_sequence.sparse[::step], start, full_sequence.group)
+            for datachunk in covering:
+                full_sequence.attrs.update(datachunk.attrs)
             return full_sequence
 
+        full_sequence = DataChunk(np.zeros((len(range(start, stop, step)), *shape[1:]),
+                                           dtype=l_datachunk[0].dtype)+fill_value,
+                                  start, l_datachunk[0].group, fill_value)
+        self._copy_into(covering, start, stop, full_sequence, step)
+        for datachunk in covering:
+            full_sequence.attrs.update(datachunk.attrs)
+
+        return full_sequence
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.get(key, self._slice)
+
+    def _copy_into(self, datachunks:list, start:int, stop:int, out:np.ndarray, step:int=1):
+        """Copy the parts of the datachunks covering the frames [start, stop), every step frames, into out,
+        an array of length len(range(start, stop, step)). The frames not covered are left untouched."""
+        for datachunk in datachunks:
+            dc_start = self._first_frame(max(datachunk.idx, start), start, step) #flooring to the maximum of both start
+            dc_stop  = min(datachunk.idx+len(datachunk), stop) # and capping to the min of both end
+            if dc_start >= dc_stop:
+                continue
+
+            new_dc_slice  = slice(dc_start-datachunk.idx, dc_stop-datachunk.idx, step)
+            res_start     = (dc_start-start)//step
+            res_slice     = slice(res_start, res_start+len(range(dc_start, dc_stop, step)))
+            out[res_slice] = datachunk[new_dc_slice]
+
     def __iter__(self):
         groups = {"sync":[],"stim":[],"data":[],"cell":[]}
         for key, dChunk_l in self._data_dict.items():
@@ -209,6 +981,63 @@ class ContiguousRecord():
 
     def __delitem__(self, key):
         del self._data_dict[key]
+        del self._starts[key]
+        self._dirty   = {(name, idx) for name, idx in self._dirty if name!=key}
+        self._deleted.add(key)
+        self._invalidate(key)
+
+    def mark_dirty(self, datachunk_name:str, idx:int=None):
+        """Signal that the DataChunks of the given name (or only the one starting at idx) were modified
+        in place, so export_record(..., mode="update") rewrites them and cached sequences are dropped."""
+        for datachunk in self._data_dict[datachunk_name]:
+            if idx is None or datachunk.idx==idx:
+                self._dirty.add((datachunk_name, datachunk.idx))
+                datachunk._digest = None #Its fingerprint is computed again
+        self._invalidate(datachunk_name)
+
+    def _mark_clean(self):
+        self._dirty.clear()
+        self._deleted.clear()
+
+    def enable_cache(self, max_bytes:int=2**28):
+        """Keep the sequences assembled when indexing the record in a LRU cache of max_bytes, to
+        return them directly when the same name and slice are requested again. The arrays returned
+        are then read-only. Entries of a name are discarded when DataChunks are set or deleted for it,
+        or when mark_dirty is called after a DataChunk of the record was modified in place."""
+        self._cache = _ByteLRU(max_bytes)
+
+    def disable_cache(self):
+        self._cache = None
+
+    def cache_info(self):
+        """Returns the (hits, misses, nbytes, max_bytes, entries) of the cache, or None if disabled"""
+        return None if self._cache is None else self._cache.info()
+
+    def memory_report(self) -> pd.DataFrame:
+        """Returns a table of the DataChunks of the record, one row per DataChunk, with their name, group, idx,
+        shape, dtype, storage ("ram", "mmap" or "lazy"), nbytes (size of the data once read), resident
+        (bytes held in RAM by the DataChunk itself) and cached (bytes held in RAM by the caches of the DataChunk:
+        its blocks in the h5 block cache, the memo of a StreamDataChunk, the rebinned counts of an EventDataChunk).
+        The assembled-sequence cache is reported by cache_info."""
+        rows = []
+        for name, dChunk_l in self._data_dict.items():
+            for datachunk in dChunk_l:
+                storage = _storage(datachunk)
+                if isinstance(datachunk, LazyDataChunk):
+                    nbytes = int(np.prod(datachunk.shape))*datachunk.dtype.itemsize
+                else:
+                    nbytes = datachunk.nbytes
+                resident = datachunk.nbytes if storage=="ram" else 0
+                rows.append((name, datachunk.group, datachunk.idx, tuple(datachunk.shape), str(datachunk.dtype),
+                             storage, nbytes, resident, _cached_bytes(datachunk)))
+        return pd.DataFrame(rows, columns=["name", "group", "idx", "shape", "dtype",
+                                           "storage", "nbytes", "resident", "cached"])
+
+    def _invalidate(self, datachunk_name:str):
+        if datachunk_name==self.MAIN_TP:
+            self._time_index = None
+        if self._cache is not None:
+            self._cache.pop_if(lambda key: key[0]==datachunk_name)
 
     def __str__(self):
         res = "ContiguousRecord:\n"
@@ -224,6 +1053,30 @@ class ContiguousRecord():
             del v
             self._data_dict[k] = None
 
+def _storage(datachunk) -> str:
+    """Where the data of a DataChunk resides: "lazy" if read from a file when indexed, "mmap" if it is a
+    memory mapped file, and "ram" otherwise (SparseDataChunk, EventDataChunk, StreamDataChunk and
+    TimepointDataChunk included, holding their compact representation in RAM)"""
+    if isinstance(datachunk, LazyDataChunk):
+        return "lazy" if isinstance(datachunk, H5DataChunk) else "ram"
+    base = datachunk
+    while isinstance(base, np.ndarray):
+        if isinstance(base, np.memmap):
+            return "mmap"
+        base = base.base
+    return "ram"
+
+def _cached_bytes(datachunk) -> int:
+    """Bytes held by the caches of a DataChunk (see ContiguousRecord.memory_report)"""
+    if isinstance(datachunk, H5DataChunk) and datachunk._cache is not None:
+        name = datachunk._dataset.name
+        return datachunk._cache.nbytes_if(lambda key: key[0]==name)
+    if isinstance(datachunk, StreamDataChunk):
+        return datachunk._memo.nbytes
+    if isinstance(datachunk, EventDataChunk):
+        return sum(counts.nbytes for counts in datachunk._rebinned.values())
+    return 0
+
 # Cell
 class RecordMaster(list):
     """
@@ -251,6 +1104,9 @@ class RecordMaster(list):
             frame_rate = [frame_rate]*len(reference_data_list)
 
         self._sep_size   = 1000 #Used for the plotting of multiple sequences
+        self._h5_file    = None #Open h5 file of a RecordMaster imported with lazy=True
+        self._h5_path    = None #h5 file the record was last imported from or exported to, see export_record
+        self._shared     = None #SharedMemory holding the data of a record given by attach_shared
         self._sequences = []
         for (ref_timepoints, ref_signals), fr in zip(reference_data_list, frame_rate):
             cs = ContiguousRecord(len(ref_timepoints), ref_signals, ref_timepoints, fr)
@@ -267,6 +1123,113 @@ class RecordMaster(list):
     def insert(self, idx:int, ref_timepoints:DataChunk, ref_signals:DataChunk, frame_rate=60):
         cs = ContiguousRecord(len(ref_timepoints), ref_signals, ref_timepoints, frame_rate)
         self._sequences.insert(idx, cs)
+        self._h5_path = None #Sequences are shifted, an update of the file would mix them
+
+    def mark_dirty(self, name:str, sequence_idx:int=None):
+        """Signal that the DataChunks of the given name were modified in place (see ContiguousRecord.mark_dirty),
+        in all sequences or only at sequence_idx."""
+        for i, seq in enumerate(self._sequences):
+            if (sequence_idx is None or i==sequence_idx) and name in seq.keys():
+                seq.mark_dirty(name)
+
+    def _mark_clean(self, h5_path:str):
+        self._h5_path = os.path.abspath(h5_path)
+        for seq in self._sequences:
+            seq._mark_clean()
+
+    def _reads_h5(self, path) -> bool:
+        """Whether the lazy DataChunks of the record read from the h5 file at path"""
+        return self._h5_file is not None and os.path.realpath(self._h5_file.filename)==os.path.realpath(path)
+
+    def _reopen_h5(self, mode:str, replacement:str=None):
+        """Reopen the h5 file read by the lazy DataChunks in another mode, and rebind them to it.
+        With replacement, the path of a file with the same datasets, it replaces the file before."""
+        lazy_dcs = [(dc, dc._dataset.name, None if dc._ndarray_group is None else dc._ndarray_group.name)
+                    for seq in self._sequences for dc_list in seq._data_dict.values()
+                    for dc in dc_list if isinstance(dc, H5DataChunk)]
+        path = self._h5_file.filename
+        self._h5_file.close()
+        if replacement is not None:
+            os.replace(replacement, path)
+        self._h5_file = h5py.File(path, mode=mode)
+        for dc, dset_name, ndarray_name in lazy_dcs:
+            dc._bind(self._h5_file[dset_name], None if ndarray_name is None else self._h5_file[ndarray_name])
+        return self._h5_file
+
+    def close(self):
+        """Close the h5 file a RecordMaster imported with lazy=True reads its DataChunks from."""
+        if self._h5_file is not None:
+            self._h5_file.close()
+            self._h5_file = None
+
+    def enable_cache(self, max_bytes:int=2**28):
+        """Enable the assembled-sequence cache of each current sequence, with max_bytes each
+        (see ContiguousRecord.enable_cache)."""
+        for seq in self._sequences:
+            seq.enable_cache(max_bytes)
+
+    def disable_cache(self):
+        for seq in self._sequences:
+            seq.disable_cache()
+
+    def cache_info(self):
+        """Returns the cache statistics summed over the sequences with an enabled cache, or None"""
+        infos = [seq.cache_info() for seq in self._sequences if seq.cache_info() is not None]
+        if len(infos)==0:
+            return None
+        return _CacheInfo(*[sum(values) for values in zip(*infos)])
+
+    def memory_report(self) -> pd.DataFrame:
+        """Returns the memory_report of each sequence (see ContiguousRecord.memory_report) in a single table,
+        with the sequence index in the first column. Summing "resident" and "cached" gives the RAM held by the
+        record, e.g. to size a job before launching it."""
+        reports = []
+        for i, seq in enumerate(self._sequences):
+            report = seq.memory_report()
+            report.insert(0, "sequence", i)
+            reports.append(report)
+        return pd.concat(reports, ignore_index=True)
+
+    def to_shared(self):
+        """Copy the data of the record in a block of shared memory, to hand it to worker processes without
+        pickling it. Send the returned SharedRecord to the workers, where attach_shared(handle) gives a
+        read-only RecordMaster of the same data, without copy. Requires python 3.8 or above.
+
+        return:
+            - The SharedRecord handle. The memory is released by handle.unlink(), or at the end of a with block
+        """
+        buffers, size = [], 0
+        def add(array):
+            nonlocal size
+            array  = np.ascontiguousarray(array)
+            offset = -(-size//64)*64 #Aligned for vectorized reads
+            buffers.append((offset, array))
+            size   = offset + array.nbytes
+            return {"offset": offset, "shape": array.shape, "dtype": array.dtype.str}
+
+        manifest = {"_sep_size": self._sep_size, "sequences": []}
+        for seq in self._sequences:
+            seq_d = {"length": seq.length, "_frame_time": seq._frame_time, "streams": {}}
+            for key, dc_list in seq._data_dict.items():
+                dc_d_list = []
+                for datachunk in dc_list:
+                    dc_d = {"idx": datachunk.idx, "group": datachunk.group, "fill": datachunk.fill,
+                            "shape": tuple(datachunk.shape), "attrs": dict(datachunk.attrs)}
+                    if getattr(datachunk, "_kind", None) is not None:
+                        dc_d["kind"]   = datachunk._kind
+                        dc_d["arrays"] = {k: add(v) for k, v in datachunk._arrays().items()}
+                    else:
+                        dc_d["data"]   = add(np.asarray(datachunk))
+                    dc_d_list.append(dc_d)
+                seq_d["streams"][key] = dc_d_list
+            manifest["sequences"].append(seq_d)
+
+        shm = _shared_memory().SharedMemory(create=True, size=max(size, 1))
+        for offset, array in buffers:
+            np.ndarray(array.shape, array.dtype, buffer=shm.buf, offset=offset)[...] = array
+        handle = SharedRecord(shm.name, manifest)
+        handle._shm = shm
+        return handle
 
     def keys(self):
         keys = []
@@ -292,16 +1255,8 @@ class RecordMaster(list):
         raise TypeError("Indexing not understood")
 
     def __iter__(self):
-        self._n = 0
-        return self
-
-    def __next__(self):
-        if self._n < len(self):
-            res = self._sequences[self._n]
-            self._n += 1
-            return res
-        else:
-            raise StopIteration
+        #A new iterator each time, so the record can be iterated from several places at once
+        return iter(self._sequences)
 
     def __len__(self):
         return len(self._sequences)
@@ -368,6 +1323,52 @@ class RecordMaster(list):
         for seq in self._sequences:
             del seq
 
+# Cell
+def _merge_intervals(intervals) -> list:
+    """Sort (start, stop) intervals and merge the overlapping or adjacent ones"""
+    merged = []
+    for start, stop in sorted(intervals):
+        if stop <= start:
+            continue
+        if len(merged)>0 and start <= merged[-1][1]:
+            if stop > merged[-1][1]:
+                merged[-1] = (merged[-1][0], stop)
+        else:
+            merged.append((start, stop))
+    return merged
+
+def _intersect_intervals(intervals_a:list, intervals_b:list) -> list:
+    """Intersection of two lists of sorted disjoint intervals"""
+    res  = []
+    i, j = 0, 0
+    while i < len(intervals_a) and j < len(intervals_b):
+        start = max(intervals_a[i][0], intervals_b[j][0])
+        stop  = min(intervals_a[i][1], intervals_b[j][1])
+        if start < stop:
+            res.append((start, stop))
+        if intervals_a[i][1] < intervals_b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return res
+
+def _substract_intervals(intervals_a:list, intervals_b:list) -> list:
+    """Parts of the sorted disjoint intervals_a not covered by the sorted disjoint intervals_b"""
+    res = []
+    j   = 0
+    for start, stop in intervals_a:
+        while j < len(intervals_b) and intervals_b[j][1] <= start:
+            j += 1
+        k = j
+        while k < len(intervals_b) and intervals_b[k][0] < stop:
+            if intervals_b[k][0] > start:
+                res.append((start, intervals_b[k][0]))
+            start = max(start, intervals_b[k][1])
+            k += 1
+        if start < stop:
+            res.append((start, stop))
+    return res
+
 # Cell
 class Data_Pipe():
     """
@@ -380,8 +1381,13 @@ class Data_Pipe():
         - data_names: Name, or list of names of the DataChunk to retrieve once the masking process is done.
         - target_names: Alias, or list of alias to give to the DataChunk in the retrieved dictionnary.
         - cast_to_np: boolean to cast the piped data into a numpy array. Can be set directly too in self.cast_to_np
+        - step: Retrieve every step-th frame of the slices, to get downsampled data. Can be set directly too in self.step
+
+    The operators (+, -, &, |, ^ and their inplace versions) are recorded and evaluated together when the
+    slices of the pipe are first needed (iteration, len, indexing), against the record as it is then.
     """
-    def __init__(self, record_master:RecordMaster, data_names:Union[str,list], target_names:Union[str,list]=None, cast_to_np=False):
+    def __init__(self, record_master:RecordMaster, data_names:Union[str,list], target_names:Union[str,list]=None, cast_to_np=False,
+                 step:int=1):
         self.record_master = record_master
         if isinstance(data_names, str):
             data_names = [data_names]
@@ -396,8 +1402,12 @@ class Data_Pipe():
 
         self.target_names = target_names
         self.data_names   = data_names
-        self._masks       = [np.zeros(len(seq), dtype=bool) for seq in record_master]
-        self._slices      = []
+        self._pending     = [] #(operator, names) of the pipe algebra not yet applied, see _evaluate
+        self._mask_cache  = [[] for seq in record_master] #Sorted disjoint (start, stop) intervals, per sequence
+        self._slice_cache = []
+        self._lock        = threading.RLock() #Evaluation of the pending operations, see _evaluate
+        self._step        = 1
+        self.step         = step
 
         self.cast_to_np   = cast_to_np
 
@@ -418,7 +1428,10 @@ class Data_Pipe():
         for i, seq in enumerate(self.record_master):
             fr = frametime_ratios[i]
             x  = np.linspace(cursor, cursor+len(seq)*fr, len(seq), endpoint=False)
-            plt.plot(x, self._masks[i]*factor-1, c='tab:blue')
+            mask = np.zeros(len(seq), dtype=bool)
+            for start, stop in self._masks[i]:
+                mask[start:stop] = 1
+            plt.plot(x, mask*factor-1, c='tab:blue')
             cursor += len(seq)*fr + self.record_master._sep_size
 
     def copy(self):
@@ -427,11 +1440,27 @@ class Data_Pipe():
         """
         new_pipe =  Data_Pipe(record_master=self.record_master,
                          data_names=self.data_names,
-                         target_names=self.target_names)
-        new_pipe._masks = np.copy(self._masks)
-        new_pipe._slices = self._slices.copy()
+                         target_names=self.target_names,
+                         cast_to_np=self.cast_to_np,
+                         step=self.step)
+        with self._lock:
+            new_pipe._pending     = list(self._pending)
+            new_pipe._mask_cache  = [list(intervals) for intervals in self._mask_cache]
+            new_pipe._slice_cache = self._slice_cache.copy()
         return new_pipe
 
+    @property
+    def _masks(self) -> list:
+        """Sorted disjoint (start, stop) intervals of the pipe, per sequence"""
+        self._evaluate()
+        return self._mask_cache
+
+    @property
+    def _slices(self) -> list:
+        """(sequence index, slice) of the pipe"""
+        self._evaluate()
+        return self._slice_cache
+
     def _get_dchunk_names(self, names):
         if isinstance(names, str):
             names = [names]
@@ -448,18 +1477,104 @@ class Data_Pipe():
         for i, seq in enumerate(self.record_master):
             for name in self.data_names:
                 if name not in seq.keys():
-                    self._masks[i] = np.zeros(len(seq), dtype=bool)
+                    self._mask_cache[i] = []
                     break
 
+    def _get_intervals(self, seq, dchunk_name:list) -> list:
+        """Sorted disjoint intervals covered in seq by the DataChunks of the given names"""
+        intervals = []
+        for name in dchunk_name:
+            for slice_ in seq.get_slice(name):
+                intervals.append((max(slice_.start, 0), min(slice_.stop, len(seq))))
+        return _merge_intervals(intervals)
+
     def _update_slices(self):
 #         self._intersect_names() #Always intersect the names we wanna retrieve ? Might be not needed (even cause bug)
-        self._slices = []
+        slices = []
         #Iterating the list of mask (one per seq of the record_master)
-        for j, mask in enumerate(self._masks):
-            seq = self.record_master[j]
-            mask = np.concatenate(([0],mask,[0])) #Putting zeros on the side in case the limits would be ones
-            for start, stop in np.where(mask[1:]-mask[:-1])[0].reshape(-1,2):#Split the mask where 0 separates the 1
-                self._slices.append((j, slice(start,stop)))
+        for j, intervals in enumerate(self._mask_cache):
+            for start, stop in intervals:
+                slices.append((j, slice(start,stop) if self._step==1 else slice(start,stop,self._step)))
+        self._slice_cache = slices #Replaced at once, for the threads reading it
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_lock"] #Can't be pickled, e.g. to send the pipe to worker processes
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @step.setter
+    def step(self, step:int):
+        if step<1:
+            raise ValueError("The step of the pipe must be positive")
+        with self._lock:
+            self._step = step
+            self._update_slices()
+
+    def _evaluate(self):
+        """Apply the pending operations of the pipe algebra to the masks. The operators only record
+        themselves, so a pipe built name by name is evaluated once, when its slices are first needed.
+        Consecutive additions (or substractions) are merged into a single one, repeated names are
+        removed, and the group names and the intervals of each name are resolved once. Threads reading
+        the slices wait for the evaluation in progress."""
+        with self._lock:
+            if len(self._pending)>0:
+                self._apply(self._pending)
+
+    def _apply(self, pending:list):
+        """Apply the operations of pending to the masks (see _evaluate)"""
+        self._pending = []
+        group_names, name_intervals = {}, {}
+        def get_intervals(names):
+            dchunk_names = []
+            for name in names:
+                if name in ["sync", "cell", "data", "stim"]:
+                    if name not in group_names:
+                        group_names[name] = self._get_dchunk_names(name)
+                    dchunk_names.extend(group_names[name])
+                else:
+                    dchunk_names.append(name)
+            res = [[] for seq in self.record_master]
+            for name in dict.fromkeys(dchunk_names):
+                if name not in name_intervals:
+                    name_intervals[name] = [self._get_intervals(seq, [name]) for seq in self.record_master]
+                for i, intervals in enumerate(name_intervals[name]):
+                    res[i].extend(intervals)
+            return [_merge_intervals(intervals) for intervals in res]
+
+        masks = self._mask_cache
+        for op, ops in itertools.groupby(pending, key=lambda e: e[0]):
+            names_l = [names for _, names in ops]
+            if op in ("add", "sub"):
+                names_l = [list(itertools.chain(*names_l))]
+            elif op=="and": #Intersecting again with the same names changes nothing
+                names_l = list(dict.fromkeys(tuple(sorted(set(names))) for names in names_l))
+            for names in names_l:
+                new_masks = get_intervals(names)
+                for i, new_intervals in enumerate(new_masks):
+                    if op=="add":
+                        masks[i] = _merge_intervals(masks[i] + new_intervals)
+                    elif op=="sub":
+                        masks[i] = _substract_intervals(masks[i], new_intervals)
+                    elif op=="and":
+                        masks[i] = _intersect_intervals(masks[i], new_intervals)
+                    else:
+                        masks[i] = _merge_intervals(_substract_intervals(masks[i], new_intervals)
+                                                    + _substract_intervals(new_intervals, masks[i]))
+        self._update_slices()
+
+    def _push(self, op:str, names:Union[str, list]):
+        if isinstance(names, str):
+            names = [names]
+        self._pending.append((op, list(names)))
+        return self
 
     def __ior__(self, names:Union[str, list]):
         return self.__iadd__(names)
@@ -467,68 +1582,69 @@ class Data_Pipe():
         return self.copy().__ior__(names)
 
     def __iand__(self, names:Union[str, list]):
-        dchunk_name = self._get_dchunk_names(names)
-        for i, seq in enumerate(self.record_master):
-            new_mask = np.zeros(len(seq), dtype=bool)
-            for name in dchunk_name:
-                for slice_ in seq.get_slice(name):
-                    new_mask[slice_] = 1
-            self._masks[i] &= new_mask
-        self._update_slices()
-        return self
+        return self._push("and", names)
     def __and__(self, names:Union[str, list]):
         return self.copy().__iand__(names)
 
     def __ixor__(self, names:Union[str, list]):
-        dchunk_name = self._get_dchunk_names(names)
-        for i, seq in enumerate(self.record_master):
-            new_mask = np.zeros(len(seq), dtype=bool)
-            for name in dchunk_name:
-                for slice_ in seq.get_slice(name):
-                    new_mask[slice_] = 1
-            self._masks[i] ^= new_mask
-        self._update_slices()
-        return self
+        return self._push("xor", names)
     def __xor__(self, names:Union[str, list]):
         return self.copy().__ixor__(names)
 
     def __iadd__(self, names:Union[str, list]):
-        dchunk_name = self._get_dchunk_names(names)
-        for i, seq in enumerate(self.record_master):
-            for name in dchunk_name:
-                for slice_ in seq.get_slice(name):
-                    self._masks[i][slice_] = 1
-        self._update_slices()
-        return self
+        return self._push("add", names)
     def __add__(self, names:Union[str, list]):
         return self.copy().__iadd__(names)
 
     def __isub__(self, names:Union[str, list]):
-        dchunk_name = self._get_dchunk_names(names)
-        for i, seq in enumerate(self.record_master):
-            for name in dchunk_name:
-                for slice_ in seq.get_slice(name):
-                    self._masks[i][slice_] = 0
-        self._update_slices()
-        return self
+        return self._push("sub", names)
     def __sub__(self, names:Union[str, list]):
         return self.copy().__isub__(names)
 
+    def to_batch(self, pad=0, align="start"):
+        """
+        Stack the data of all the slices of the pipe into one array per data name, of shape
+        (n_slices, max_len, ...). The arrays are allocated once and filled directly from the DataChunks.
+
+        params:
+            - pad: Value given to the frames past the length of a slice
+            - align: "start" to align the slices on their first frame (padding at the end), or "end"
+                     to align them on their last frame (padding at the beginning)
+
+        return:
+            - Dictionnary of the batched arrays, with the target names as keys
+            - Lengths of the slices
+        """
+        assert align in ["start", "end"], "align must be one of ['start', 'end']"
+        lengths = np.array([len(range(_slice.start, _slice.stop, self.step)) for _, _slice in self._slices], dtype=int)
+        max_len = lengths.max() if len(lengths)>0 else 0
+        ref_dcs = {}
+        for name in self.data_names:
+            ref_dcs[name] = [seq._data_dict[name][0] for seq in self.record_master if name in seq.keys()]
+            if len(ref_dcs[name])==0:
+                raise KeyError("No DataChunk named %s in the record"%name)
+        res = {}
+        for name, target_name in zip(self.data_names, self.target_names):
+            ref_dc = ref_dcs[name][0]
+            batch  = np.empty((len(self._slices), max_len, *ref_dc.shape[1:]), dtype=np.result_type(ref_dc.dtype, pad))
+            for i, (seq_idx, _slice) in enumerate(self._slices):
+                seq    = self.record_master[seq_idx]
+                offset = 0 if align=="start" else max_len-lengths[i]
+                batch[i, :offset] = pad
+                batch[i, offset+lengths[i]:] = pad
+                batch[i, offset:offset+lengths[i]] = ref_dc.fill
+                seq._copy_into(seq.get_chunks(name, _slice.start, _slice.stop), _slice.start, _slice.stop,
+                               batch[i, offset:offset+lengths[i]], self.step)
+            res[target_name] = batch
+        return res, lengths
+
     def __iter__(self):
         self._n = 0
         return self
 
     def __next__(self):
         if self._n < len(self):
-            res = {}
-            seq_idx, _slice = self._slices[self._n]
-            self.record_master[seq_idx].set_slice(_slice)
-            for i, name in enumerate(self.data_names):
-                if self.cast_to_np:
-                    res[self.target_names[i]] = np.array(self.record_master[seq_idx][name])
-                else:
-                    res[self.target_names[i]] = self.record_master[seq_idx][name]
-            self.record_master[seq_idx].set_slice(None)
+            res = self._read_slice(*self._slices[self._n])
             self._n += 1
             return res
         else:
@@ -537,33 +1653,113 @@ class Data_Pipe():
     def __len__(self):
         return len(self._slices)
 
+    def _read_slice(self, seq_idx:int, _slice:slice) -> dict:
+        """Returns the dictionnary of the data of the pipe for one of its slices. The record is
+        not modified, so slices can be read concurrently."""
+        seq = self.record_master[seq_idx]
+        res = {}
+        for i, name in enumerate(self.data_names):
+            if self.cast_to_np:
+                res[self.target_names[i]] = np.array(seq.get(name, _slice))
+            else:
+                res[self.target_names[i]] = seq.get(name, _slice)
+        return res
+
     def __getitem__(self, key):
         if isinstance(key, (int, np.integer)):
-            seq_idx, _slice = self._slices[key]
-            self.record_master[seq_idx].set_slice(_slice)
-            res = {}
-            for i, name in enumerate(self.data_names):
-                if self.cast_to_np:
-                    res[self.target_names[i]] = np.array(self.record_master[seq_idx][name])
-                else:
-                    res[self.target_names[i]] = self.record_master[seq_idx][name]
-            self.record_master[seq_idx].set_slice(None)
-            return res
+            return self._read_slice(*self._slices[key])
         elif isinstance(key, slice):
-            l_res = []
-            for seq_idx, _slice in self._slices[key]:
-                res = {}
-                for i, name in enumerate(self.data_names):
-                    if self.cast_to_np:
-                        res[self.target_names[i]] = np.array(self.record_master[seq_idx][name][_slice])
-                    else:
-                        res[self.target_names[i]] = self.record_master[seq_idx][name][_slice]
-
-                l_res.append(res)
-            return l_res
+            return [self._read_slice(seq_idx, _slice) for seq_idx, _slice in self._slices[key]]
         else:
             raise IndexError ("only integers and slices (`:`) are valid indices")
 
+    def map(self, func, workers:int=1) -> list:
+        """Apply func to the data dictionnary of each slice of the pipe.
+
+        params:
+            - func: Function taking the dictionnary of a slice (as returned when iterating the pipe)
+            - workers: Number of threads reading and processing the slices. h5py and most numpy
+                       operations release the GIL, so lazy records and heavy processing benefit from it.
+        return:
+            - The list of the results of func, in the order of the slices"""
+        def process(slice_info):
+            return func(self._read_slice(*slice_info))
+        if workers<=1:
+            return [process(slice_info) for slice_info in self._slices]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(process, self._slices))
+
+    def iter_prefetch(self, depth:int=2):
+        """Iterate over the pipe like a for loop would, while a background thread already assembles
+        the next slices. Useful when reading the record is slow (lazy import, network drive).
+
+        params:
+            - depth: Maximum number of slices assembled in advance of the one being processed, bounding the
+                     memory used: at most depth+1 slices are held at once. Must be at least 1.
+        return:
+            - A generator of the data dictionnaries of the slices. An error raised while reading a slice
+              is raised once the slices before it have been yielded."""
+        if depth<1:
+            raise ValueError("depth must be at least 1")
+        slices  = list(self._slices) #Evaluated once, before the producer starts
+        slots   = threading.Semaphore(depth)
+        results = queue.Queue()
+        stop    = threading.Event()
+        def producer():
+            for slice_info in slices:
+                slots.acquire()
+                if stop.is_set():
+                    return
+                try:
+                    results.put((self._read_slice(*slice_info), None))
+                except Exception as e:
+                    results.put((None, e))
+                    return
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        try:
+            for _ in range(len(slices)):
+                res, exc = results.get()
+                slots.release()
+                if exc is not None:
+                    raise exc
+                yield res
+        finally:
+            stop.set()
+            slots.release() #Wakes up the producer if it waits for a slot
+            thread.join()
+
+    def memory_peak(self, func=None) -> int:
+        """Measures with tracemalloc the transient memory needed to iterate over the pipe, reading (and
+        processing with func if given) one slice at a time.
+
+        params:
+            - func: Function applied to the data dictionnary of each slice, as in `map`. Its result is discarded.
+        return:
+            - The peak of memory allocated during the iteration, in bytes above the memory allocated before it"""
+        tracing = tracemalloc.is_tracing()
+        if tracing and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        elif tracing: #reset_peak needs python 3.9, restarting the tracing also resets the peak
+            limit = tracemalloc.get_traceback_limit()
+            tracemalloc.stop()
+            tracemalloc.start(limit)
+        else:
+            tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            for slice_info in self._slices:
+                res = self._read_slice(*slice_info)
+                if func is not None:
+                    func(res)
+                del res
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return peak - start
+
     def __str__(self):
         return "(datachunks, targets, slices), "+self.__repr__()
 
@@ -571,53 +1767,296 @@ class Data_Pipe():
         return "Pipe(%s)"%(repr(self.data_names)+", "+repr(self.target_names)+", "+repr(self._slices))
 
 # Cell
-def export_record(path, record_master):
+def _time_major_chunks(shape:tuple, itemsize:int, chunk_bytes:int) -> tuple:
+    """Chunk shape made of whole frames and of about chunk_bytes, so a time slice reads few chunks"""
+    frame_bytes = max(int(np.prod(shape[1:], dtype=int))*itemsize, 1)
+    n_frames    = int(min(max(chunk_bytes//frame_bytes, 1), shape[0]))
+    return (n_frames, *shape[1:])
+
+def _deflate_chunk(data:np.ndarray, chunk_shape:tuple, level:int, shuffle:bool) -> bytes:
+    """Encode a chunk like the h5 shuffle and gzip filters do. Edge chunks are zero padded to the full
+    chunk shape, as they are stored by HDF5."""
+    if data.shape != chunk_shape:
+        data = np.pad(data, [(0, c-s) for c, s in zip(chunk_shape, data.shape)])
+    buffer = np.ascontiguousarray(data).view(np.uint8)
+    if shuffle and data.itemsize>1:
+        buffer = np.ascontiguousarray(buffer.reshape(-1, data.itemsize).T)
+    return zlib.compress(buffer, level)
+
+def _write_dataset(h5_group, name:str, data:np.ndarray, compression, compression_opts, shuffle:bool,
+                   chunk_bytes:int, executor=None):
+    """Create the dataset name in h5_group with time-major chunks. With an executor, gzip chunks are
+    compressed concurrently and written directly, bypassing the (serial) h5 filter pipeline."""
+    if data.ndim==0 or data.size==0:
+        return h5_group.create_dataset(name, data=data)
+    chunks = _time_major_chunks(data.shape, data.itemsize, chunk_bytes)
+    dset   = h5_group.create_dataset(name, shape=data.shape, dtype=data.dtype, chunks=chunks,
+                                     compression=compression, compression_opts=compression_opts,
+                                     shuffle=shuffle)
+    if executor is None or compression!="gzip" or data.dtype.kind not in "biufc" or len(data)<=chunks[0]:
+        dset[...] = data
+        return dset
+    starts  = range(0, len(data), chunks[0])
+    encoded = executor.map(lambda start: _deflate_chunk(data[start:start+chunks[0]], chunks,
+                                                        compression_opts, shuffle), starts)
+    for start, encoded_chunk in zip(starts, encoded):
+        dset.id.write_direct_chunk((start,)+(0,)*(data.ndim-1), encoded_chunk)
+    return dset
+
+def _scalar_type(value) -> str:
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, np.integer)):
+        return "int"
+    if isinstance(value, (float, np.floating)):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    return None
+
+_STRUCT_DTYPES = {"bool": np.bool_, "int": np.int64, "float": np.float64, "str": h5py.string_dtype()}
+
+def _to_struct(value):
+    """Encode a list of scalars, a list of rows (lists or tuples of scalars, like the signal_shifts) or a dict
+    of scalars (like the cell_map) as a structured array with one field per column.
+
+    return:
+        - The structured array and its schema (kind of container and type of each column), or None when
+          value has no such regular structure"""
+    if isinstance(value, dict):
+        kind, rows = "dict", list(value.items())
+    elif isinstance(value, (list, tuple)) and all(isinstance(row, (list, tuple)) for row in value):
+        kind, rows = "rows", value
+    elif isinstance(value, (list, tuple)):
+        kind, rows = "list", [(v,) for v in value]
+    else:
+        return None
+    if len(rows)==0 or len(rows[0])==0 or any(len(row)!=len(rows[0]) for row in rows):
+        return None
+    types = []
+    for column in zip(*rows):
+        column_types = {_scalar_type(v) for v in column}
+        if len(column_types)!=1 or None in column_types:
+            return None
+        types.append(column_types.pop())
+    try:
+        array = np.array([tuple(row) for row in rows],
+                         dtype=[("f%d"%i, _STRUCT_DTYPES[t]) for i, t in enumerate(types)])
+    except OverflowError:
+        return None
+    return array, {"kind": kind, "types": types}
+
+def _json_default(value):
+    """Encode the numpy scalars and arrays nested in attributes for json.dumps"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError("Object of type %s is not JSON serializable"%type(value).__name__)
+
+def _dump_attr(value) -> str:
+    """JSON encoding of the attributes that aren't arrays nor stored with _to_struct"""
+    return json.dumps(value, default=_json_default)
+
+def _from_struct(array:np.ndarray, schema:dict):
+    """Decode a structured array encoded by _to_struct back to python objects. Rows are decoded as lists,
+    as they would be from JSON."""
+    columns = []
+    for i, t in enumerate(schema["types"]):
+        column = array["f%d"%i].tolist()
+        if t=="str":
+            column = [v.decode() if isinstance(v, bytes) else v for v in column]
+        columns.append(column)
+    if schema["kind"]=="list":
+        return columns[0]
+    if schema["kind"]=="dict":
+        return dict(zip(*columns))
+    return [list(row) for row in zip(*columns)]
+
+def _write_datachunk(stream_ref, datachunk, compression, compression_opts, shuffle:bool, chunk_bytes:int,
+                     executor=None, payloads=None):
+    """Write a DataChunk and its attributes in stream_ref, replacing the ones starting at the same index.
+    DataChunks with a kind (see LazyDataChunk) are written as a group of their arrays.
+    With payloads, a dict of the payloads already written in the file, a DataChunk with the same data and
+    dataset attributes as one of them is stored as a hard link to it."""
+    kind = getattr(datachunk, "_kind", None)
+    #Read first, a lazy DataChunk may read the replaced dataset
+    data  = datachunk._arrays() if kind is not None else np.asarray(datachunk)
+    attrs = datachunk.attrs
+    for name in (str(datachunk.idx), "__ndarray_"+str(datachunk.idx)):
+        if name in stream_ref:
+            del stream_ref[name]
+    structs    = {k: None if isinstance(v, (np.ndarray,)) else _to_struct(v) for k, v in attrs.items()}
+    dset_attrs = {k: _dump_attr(v) for k, v in attrs.items() if not isinstance(v, (np.ndarray,)) and structs[k] is None}
+    payload    = None
+    if payloads is not None: #The attributes stored on the dataset are shared by its hard links
+        #Hashing the data written, as the digest kept by the DataChunk misses in-place modifications
+        if kind is not None:
+            datachunk._digest = _digest_arrays(kind, datachunk.shape, datachunk.dtype, data)
+        else:
+            datachunk._digest = _digest_frames(lambda start, stop: data[start:stop], data.shape, data.dtype)
+        payload = (datachunk._digest, _attr_bytes([datachunk.fill, datachunk.group, dset_attrs]))
+    linked = payloads.get(payload) if payload is not None else None
+    if linked is not None:
+        stream_ref[str(datachunk.idx)] = stream_ref.file[linked]
+        dset = stream_ref[str(datachunk.idx)]
+    elif kind is not None:
+        dset = stream_ref.create_group(str(datachunk.idx))
+        for array_k, array_v in data.items():
+            _write_dataset(dset, array_k, array_v, compression, compression_opts, shuffle, chunk_bytes, executor)
+        dset.attrs["__kind"]  = kind
+        dset.attrs["__shape"] = datachunk.shape
+    else:
+        dset = _write_dataset(stream_ref, str(datachunk.idx), data, compression,
+                              compression_opts, shuffle, chunk_bytes, executor)
+    ndarray_ref = stream_ref.create_group("__ndarray_"+str(datachunk.idx))
+    for attr_k, attr_v in attrs.items():
+        struct = structs[attr_k]
+        if isinstance(attr_v, (np.ndarray,)):
+            ndarray_ref.create_dataset(attr_k, data=attr_v, compression=compression,
+                                       compression_opts=compression_opts)
+        elif struct is not None: #Typed binary storage, fast to decode and without the h5 attribute size limit
+            struct_dset = ndarray_ref.create_dataset(attr_k, data=struct[0], compression=compression,
+                                                     compression_opts=compression_opts)
+            struct_dset.attrs["__schema"] = json.dumps(struct[1])
+    if linked is None:
+        for attr_k, attr_v in dset_attrs.items():
+            dset.attrs[attr_k] = attr_v
+        dset.attrs["__fill"] = datachunk.fill
+        dset.attrs["__group"] = datachunk.group
+        if payload is not None:
+            payloads[payload] = dset.name
+    if isinstance(datachunk, H5DataChunk) and datachunk._dataset.file == stream_ref.file:
+        datachunk._bind(dset, ndarray_ref)
+
+def export_record(path, record_master, compression="gzip", compression_opts=4, shuffle=False,
+                  chunk_bytes=2**20, workers=1, verbose=True, mode="w", deduplicate=True):
     """Export a Record_Master object to an h5 file, readable outside of this library.
 
     params:
         - path: path of the file to be saved
         - record_master: RecordMaster to save
+        - compression: Compression of the datasets in {"gzip", "lzf", None}
+        - compression_opts: Level of the gzip compression, from 0 to 9
+        - shuffle: Apply the h5 shuffle filter before compression, which usually improves
+                   the compression of integer and float data
+        - chunk_bytes: Approximate size of the h5 chunks. Chunks are made of whole frames.
+        - workers: Number of threads compressing the gzip chunks
+        - verbose: Print the DataChunks as they are exported
+        - mode: "w" to write the whole record. "update" to only rewrite the DataChunks set, deleted or
+                marked dirty since the record was imported in full from or exported to the file at path.
+                When no file exists at path, the whole record is written.
+        - deduplicate: Store the identical DataChunks written (same data, fill, group and attributes, e.g. a
+                       stimulus repeated in every sequence) once, and hard link them (see DataChunk.fingerprint)
     """
-    print("Exporting the record master")
-    with h5py.File(path, mode="w") as h5_f:
+    if mode not in ("w", "update"):
+        raise ValueError("Unknown mode %s, must be w or update"%mode)
+    if compression=="none":
+        compression = None
+    if compression not in ("gzip", "lzf", None):
+        raise ValueError("Unknown compression %s, must be one of gzip, lzf or None"%compression)
+    if compression!="gzip":
+        compression_opts = None
+    if mode=="update" and not os.path.exists(path):
+        mode = "w"
+    elif mode=="update" and record_master._h5_path!=os.path.abspath(path):
+        raise ValueError("record was not loaded in full from %s, update impossible; export with mode='w' "
+                         "to a new path"%path)
+    in_source = record_master._reads_h5(path)
+    log = print if verbose else (lambda *args: None)
+    log("Exporting the record master")
+    with contextlib.ExitStack() as on_exit:
+        if mode=="update" and in_source:
+            h5_f = record_master._reopen_h5("r+") #The lazy DataChunks keep reading from the updated file
+            on_exit.callback(record_master._reopen_h5, "r") #Then read-only again, so other processes can open it
+        elif mode=="update":
+            h5_f = on_exit.enter_context(h5py.File(path, mode="r+"))
+        else: #The lazy DataChunks may read the file overwritten: a new one replaces it once written
+            h5_f = on_exit.enter_context(h5py.File(path+".tmp" if in_source else path, mode="w"))
+        executor = None
+        if workers>1 and compression=="gzip":
+            executor = on_exit.enter_context(ThreadPoolExecutor(max_workers=workers))
+        payloads = {} if deduplicate else None
         fr = None
         if hasattr(record_master, '_frame_time'):
             fr = record_master._frame_time #_frame_time was moved to Contigous_Record
         h5_f.attrs["_sep_size"]   = record_master._sep_size
+        for key_contig in list(h5_f.keys()):
+            if int(key_contig) >= len(record_master):
+                del h5_f[key_contig]
         for i, contig in enumerate(record_master):
             #create contig
-            print("Contiguous sequence",i)
-            cntig_ref = h5_f.create_group(str(i))
+            log("Contiguous sequence",i)
+            cntig_ref = h5_f.require_group(str(i))
             cntig_ref.attrs["length"] = contig.length
             if fr is not None:
                 cntig_ref.attrs["_frame_time"] = fr
             else:
                 cntig_ref.attrs["_frame_time"] = contig._frame_time
+            if mode=="update":
+                for key in contig._deleted - set(contig.keys()):
+                    if key in cntig_ref:
+                        del cntig_ref[key]
             for key, dc_list in contig._data_dict.items():
+                if mode=="update":
+                    if key in contig._deleted and key in cntig_ref: #Remove the DataChunks not set again
+                        kept = {str(dc.idx) for dc in dc_list}
+                        for key_dc in list(cntig_ref[key].keys()):
+                            if key_dc.replace("__ndarray_", "") not in kept:
+                                del cntig_ref[key][key_dc]
+                    dc_list = [dc for dc in dc_list if (key, dc.idx) in contig._dirty]
+                    if len(dc_list)==0:
+                        continue
                 #create datastream
-                print("...Entering stream",key)
-                stream_ref = cntig_ref.create_group(key)
+                log("...Entering stream",key)
+                stream_ref = cntig_ref.require_group(key)
                 for datachunk in dc_list:
-                    print("......",str(datachunk.idx)+"->"+str(datachunk.idx+len(datachunk)))
-                    dset = stream_ref.create_dataset(str(datachunk.idx), data=np.array(datachunk), compression="gzip", compression_opts=4)
-                    ndarray_ref = stream_ref.create_group("__ndarray_"+str(datachunk.idx))
-                    for attr_k, attr_v in datachunk.attrs.items():
-                        if isinstance(attr_v, (np.ndarray,)):
-                            ndarray_ref.create_dataset(attr_k, data=attr_v, compression="gzip", compression_opts=4)
-                        else:
-                            dset.attrs[attr_k] = json.dumps(attr_v)
-                    dset.attrs["__fill"] = datachunk.fill
-                    dset.attrs["__group"] = datachunk.group
-    print()
+                    log("......",str(datachunk.idx)+"->"+str(datachunk.idx+len(datachunk)))
+                    _write_datachunk(stream_ref, datachunk, compression, compression_opts,
+                                     shuffle, chunk_bytes, executor, payloads)
+    if mode=="w" and in_source:
+        record_master._reopen_h5("r", replacement=path+".tmp")
+    record_master._mark_clean(path)
+    log()
+
+def _read_h5_attrs(dataset, ndarray_group=None) -> dict:
+    """Decode the attributes of a DataChunk saved by export_record"""
+    attrs = {}
+    for k,v in dataset.attrs.items():
+        if k not in  ["__fill", "__group", "__kind", "__shape"]:
+            attrs[k] = json.loads(v)
+    if ndarray_group is not None:
+        for k,v in ndarray_group.items():
+            if "__schema" in v.attrs: #Structured attribute
+                attrs[k] = _from_struct(v[()], json.loads(v.attrs["__schema"]))
+            else:
+                attrs[k] = v[:]
+    return attrs
+
+def _is_selected(name:str, group:str=None, names=None, groups=None) -> bool:
+    """Whether a DataChunk is imported for the names and groups requested (None for all).
+    main_tp and signals are always imported, as they define the sequences."""
+    if name in (ContiguousRecord.MAIN_TP, ContiguousRecord.SIGNALS):
+        return True
+    return (names is None or name in names) and (groups is None or group is None or group in groups)
 
-def import_record(path):
+def import_record(path, lazy=False, cache_size=2**28, names=None, groups=None, sequences=None):
     """Import a Record_Master from an h5 file saved by the export_record function of this library.
 
     params:
         - path: path of the RecordMaster to import
+        - lazy: If True, DataChunks are H5DataChunk that read only the slices accessed. The file then stays
+                open until record_master.close() is called.
+        - cache_size: Size in bytes of the LRU cache of decompressed blocks, shared by the lazy DataChunks
+        - names: Names of the DataChunks to import. None for all.
+        - groups: Groups of the DataChunks to import, in {stim, sync, cell, data}. None for all.
+        - sequences: Indexes of the contiguous sequences to import, renumbered from 0 in the RecordMaster.
+                     None for all. Such a record can't be exported with mode="update" to its file.
     """
     print("Importing the record master")
-    with h5py.File(path, mode="r") as h5_f:
+    h5_f  = h5py.File(path, mode="r")
+    cache = _ByteLRU(cache_size) if lazy else None
+    with contextlib.ExitStack() as on_exit:
+        if not lazy: #Lazy DataChunks keep reading from the file
+            on_exit.callback(h5_f.close)
         record_master    = None
         frame_rate = None
         reg         = re.compile("frame_time")
@@ -625,11 +2064,15 @@ def import_record(path):
         if len(fr_time_key)==1:
             frame_rate = round(1/h5_f.attrs[fr_time_key[0]])
         keys = sorted(h5_f.keys(), key=int)
+        if sequences is not None:
+            keys = [key for key in keys if int(key) in sequences]
         for j, key_contig in enumerate(keys):
             ref_contig = h5_f[key_contig]
             stream_d   = {}
             keys = sorted(h5_f.keys(), key=int)
             for i, key_dstream in enumerate(ref_contig.keys()):
+                if not _is_selected(key_dstream, names=names):
+                    continue
                 ref_dstream = ref_contig[key_dstream]
                 dchunk_l = []
                 for key_dc in ref_dstream.keys():
@@ -637,23 +2080,26 @@ def import_record(path):
                         continue
                     data = ref_dstream[key_dc]
                     idx  = int(key_dc)
-                    attrs = {}
-                    for k,v in data.attrs.items():
-                        if k not in  ["__fill", "__group"]:
-                            attrs[k] = json.loads(v)
-                        elif k == "__fill":
-                            fill = v
-                        elif k == "__group":
-                            group = v
-                    if "__ndarray_"+str(idx) in ref_dstream.keys():
-                        # if condition for backward support
-                        for k,v in ref_dstream["__ndarray_"+str(idx)].items():
-                            attrs[k] = v[:]
-                    dchunk = DataChunk(data=data[:], idx=idx, group=group)
-                    dchunk.attrs = attrs
+                    fill, group = data.attrs["__fill"], data.attrs["__group"]
+                    if not _is_selected(key_dstream, group, names, groups):
+                        continue
+                    # get for backward support
+                    ndarray_group = ref_dstream.get("__ndarray_"+str(idx))
+                    if "__kind" in data.attrs: #Compact representation, always loaded
+                        dchunk = _CHUNK_KINDS[data.attrs["__kind"]]._from_arrays({k: v[:] for k, v in data.items()},
+                                                                                 tuple(data.attrs["__shape"]),
+                                                                                 idx, group, fill)
+                        dchunk.attrs = _read_h5_attrs(data, ndarray_group)
+                    elif lazy:
+                        dchunk = H5DataChunk(data, idx=idx, group=group, fill=fill,
+                                             cache=cache, ndarray_group=ndarray_group)
+                    else:
+                        dchunk = DataChunk(data=data[:], idx=idx, group=group, fill=fill)
+                        dchunk.attrs = _read_h5_attrs(data, ndarray_group)
                     dchunk_l.append(dchunk)
 
-                stream_d[key_dstream] = dchunk_l
+                if len(dchunk_l)>0:
+                    stream_d[key_dstream] = dchunk_l
             if len(fr_time_key)==0:
                 frame_rate = round(1/ref_contig.attrs["_frame_time"])
             if record_master is None:
@@ -665,5 +2111,237 @@ def import_record(path):
                     if kstream in ["main_tp", "signals"] and k==0:
                         continue
                     record_master.set_datachunk(dc, name=kstream, sequence_idx=j)
+    if lazy:
+        record_master._h5_file = h5_f
+    record_master._mark_clean(path)
+    if sequences is not None: #The sequences of the record don't match the ones of the file
+        record_master._h5_path = None
     print()
+    return record_master
+
+# Cell
+def _to_json(value):
+    """Cast numpy scalars to python ones so they can be dumped to JSON"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def _save_npy(path, array):
+    """Save array to path through a temporary file, so a record memory-mapping the previous file keeps
+    reading it intact"""
+    with open(path+".tmp", "wb") as f:
+        np.save(f, array)
+    os.replace(path+".tmp", path)
+
+def _fixed_width(array:np.ndarray) -> np.ndarray:
+    """Cast the str columns of a structured array made by _to_struct to fixed-width unicode, as .npy files
+    can't store variable-length strings without pickling them"""
+    dtype = []
+    for name in array.dtype.names:
+        if array.dtype[name].kind=="O":
+            dtype.append((name, "U%d"%max(1, max(len(v) for v in array[name]))))
+        else:
+            dtype.append((name, array.dtype[name]))
+    return array.astype(dtype)
+
+def export_record_mmap(path, record_master):
+    """Export a Record_Master object to a directory of uncompressed .npy files (one per DataChunk and
+    per array attribute), described by a JSON manifest. Unlike the h5 files of export_record, it can be
+    opened instantly with import_record_mmap. Attributes are encoded like in export_record. A record
+    imported from path can be exported back to it.
+
+    params:
+        - path: path of the directory to be saved
+        - record_master: RecordMaster to save
+    """
+    manifest = {"version": 1, "_sep_size": record_master._sep_size, "sequences": []}
+    for i, contig in enumerate(record_master):
+        seq_d = {"length": contig.length, "_frame_time": contig._frame_time, "streams": {}}
+        for key, dc_list in contig._data_dict.items():
+            os.makedirs(os.path.join(path, str(i), key), exist_ok=True)
+            dc_d_list = []
+            for datachunk in dc_list:
+                fn = os.path.join(str(i), key, str(datachunk.idx))
+                dc_d = {"idx": datachunk.idx, "group": datachunk.group, "fill": _to_json(datachunk.fill),
+                        "shape": datachunk.shape, "dtype": datachunk.dtype.str, "attrs": {}, "ndarray_attrs": {}}
+                if getattr(datachunk, "_kind", None) is not None:
+                    dc_d["kind"], dc_d["arrays"] = datachunk._kind, {}
+                    for array_k, array_v in datachunk._arrays().items():
+                        _save_npy(os.path.join(path, fn+"__"+datachunk._kind+"_"+array_k+".npy"), array_v)
+                        dc_d["arrays"][array_k] = {"file": fn+"__"+datachunk._kind+"_"+array_k+".npy",
+                                                   "shape": array_v.shape}
+                else:
+                    _save_npy(os.path.join(path, fn+".npy"), np.asarray(datachunk))
+                    dc_d["file"] = fn+".npy"
+                for attr_k, attr_v in datachunk.attrs.items():
+                    struct = None if isinstance(attr_v, (np.ndarray,)) else _to_struct(attr_v)
+                    if isinstance(attr_v, (np.ndarray,)):
+                        _save_npy(os.path.join(path, fn+"__"+attr_k+".npy"), attr_v)
+                        dc_d["ndarray_attrs"][attr_k] = {"file": fn+"__"+attr_k+".npy", "shape": attr_v.shape}
+                    elif struct is not None: #Typed like in the h5 files, keeping the int keys of dicts
+                        _save_npy(os.path.join(path, fn+"__"+attr_k+".npy"), _fixed_width(struct[0]))
+                        dc_d.setdefault("struct_attrs", {})[attr_k] = {"file": fn+"__"+attr_k+".npy",
+                                                                       "schema": struct[1]}
+                    else:
+                        dc_d["attrs"][attr_k] = json.loads(_dump_attr(attr_v))
+                dc_d_list.append(dc_d)
+            seq_d["streams"][key] = dc_d_list
+        manifest["sequences"].append(seq_d)
+    with open(os.path.join(path, "manifest.json.tmp"), "w") as f:
+        json.dump(manifest, f)
+    os.replace(os.path.join(path, "manifest.json.tmp"), os.path.join(path, "manifest.json"))
+
+def _load_npy(path, shape):
+    """Memory-map a .npy file in read-only mode (empty arrays can't be memory-mapped)"""
+    return np.load(path, mmap_mode="r" if np.prod(shape)>0 else None)
+
+def import_record_mmap(path, names=None, groups=None, sequences=None):
+    """Import a Record_Master from a directory saved by export_record_mmap. The data of the DataChunks
+    is memory-mapped (read-only), so it is only read from the disk when accessed, and the pages are
+    shared by all the processes opening the same record.
+
+    params:
+        - path: path of the directory of the RecordMaster to import
+        - names: Names of the DataChunks to import. None for all.
+        - groups: Groups of the DataChunks to import, in {stim, sync, cell, data}. None for all.
+        - sequences: Indexes of the contiguous sequences to import, renumbered from 0. None for all.
+    """
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    record_master = None
+    seq_d_list = [seq_d for i, seq_d in enumerate(manifest["sequences"]) if sequences is None or i in sequences]
+    for j, seq_d in enumerate(seq_d_list):
+        stream_d = {}
+        for key, dc_d_list in seq_d["streams"].items():
+            dchunk_l = []
+            for dc_d in dc_d_list:
+                if not _is_selected(key, dc_d["group"], names, groups):
+                    continue
+                if "kind" in dc_d:
+                    arrays = {k: _load_npy(os.path.join(path, a_d["file"]), a_d["shape"])
+                              for k, a_d in dc_d["arrays"].items()}
+                    dchunk = _CHUNK_KINDS[dc_d["kind"]]._from_arrays(arrays, tuple(dc_d["shape"]), dc_d["idx"],
+                                                                     dc_d["group"], dc_d["fill"])
+                else:
+                    data   = _load_npy(os.path.join(path, dc_d["file"]), dc_d["shape"])
+                    dchunk = DataChunk(data=data, idx=dc_d["idx"], group=dc_d["group"], fill=dc_d["fill"])
+                dchunk.attrs = dict(dc_d["attrs"])
+                for attr_k, attr_d in dc_d["ndarray_attrs"].items():
+                    dchunk.attrs[attr_k] = _load_npy(os.path.join(path, attr_d["file"]), attr_d["shape"])
+                for attr_k, attr_d in dc_d.get("struct_attrs", {}).items():
+                    dchunk.attrs[attr_k] = _from_struct(np.load(os.path.join(path, attr_d["file"])), attr_d["schema"])
+                dchunk_l.append(dchunk)
+            if len(dchunk_l)>0:
+                stream_d[key] = dchunk_l
+        frame_rate = round(1/seq_d["_frame_time"])
+        if record_master is None:
+            record_master = RecordMaster([(stream_d["main_tp"][0],stream_d["signals"][0])], frame_rate=frame_rate)
+            record_master._sep_size = manifest["_sep_size"]
+        else:
+            record_master.append(stream_d["main_tp"][0],stream_d["signals"][0], frame_rate=frame_rate)
+        for kstream, vstream in stream_d.items():
+            for k, dc in enumerate(vstream):
+                if kstream in ["main_tp", "signals"] and k==0:
+                    continue
+                record_master.set_datachunk(dc, name=kstream, sequence_idx=j)
+    return record_master
+
+# Cell
+class SharedRecord():
+    """Picklable handle of a RecordMaster copied in shared memory by RecordMaster.to_shared. It only holds
+    the name of the memory block and the description of the DataChunks, so it is cheap to send to the
+    workers of a process pool, which call attach_shared(handle) to read the record.
+
+    The process that created it owns the memory: it must keep the handle until the workers are done, then
+    call unlink() (done when leaving a with block).
+    params:
+        - name: Name of the shared memory block
+        - manifest: Description of the sequences and DataChunks of the record"""
+    def __init__(self, name:str, manifest:dict):
+        self.name     = name
+        self.manifest = manifest
+        self._shm     = None #SharedMemory of the creator
+
+    def __getstate__(self):
+        return {"name": self.name, "manifest": self.manifest}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    def unlink(self):
+        """Release the shared memory. Records attached in the creating process must be deleted before."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        _SHARED_RECORDS.pop(self.name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def __repr__(self):
+        return "SharedRecord(%s, %d sequences)"%(self.name, len(self.manifest["sequences"]))
+
+_SHARED_RECORDS = {} #RecordMaster attached in this process, by name of shared memory
+
+def _shared_memory():
+    """Returns the multiprocessing.shared_memory module, imported when needed as it requires python 3.8"""
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise ImportError("Sharing a RecordMaster between processes requires python 3.8 or above") from None
+    return shared_memory
+
+def attach_shared(handle:SharedRecord) -> RecordMaster:
+    """
+    Get the RecordMaster of a SharedRecord, whose DataChunks are read-only views on the shared memory.
+    The record is attached once per process, so calling it for each task of a worker is free.
+
+    params:
+        - handle: SharedRecord returned by RecordMaster.to_shared
+    return:
+        - The RecordMaster, with the same API as the original one
+    """
+    if handle.name in _SHARED_RECORDS:
+        return _SHARED_RECORDS[handle.name]
+    if sys.version_info >= (3, 13): #Only the creator unlinks the memory
+        shm = _shared_memory().SharedMemory(name=handle.name, track=False)
+    else:
+        shm = _shared_memory().SharedMemory(name=handle.name)
+
+    def view(array_d):
+        array = np.ndarray(tuple(array_d["shape"]), np.dtype(array_d["dtype"]), buffer=shm.buf, offset=array_d["offset"])
+        array.flags.writeable = False
+        return array
+
+    record_master = None
+    for j, seq_d in enumerate(handle.manifest["sequences"]):
+        stream_d = {}
+        for key, dc_d_list in seq_d["streams"].items():
+            dchunk_l = []
+            for dc_d in dc_d_list:
+                if "kind" in dc_d:
+                    arrays = {k: view(a_d) for k, a_d in dc_d["arrays"].items()}
+                    dchunk = _CHUNK_KINDS[dc_d["kind"]]._from_arrays(arrays, dc_d["shape"], dc_d["idx"],
+                                                                     dc_d["group"], dc_d["fill"])
+                else:
+                    dchunk = DataChunk(data=view(dc_d["data"]), idx=dc_d["idx"], group=dc_d["group"], fill=dc_d["fill"])
+                dchunk.attrs = dict(dc_d["attrs"])
+                dchunk_l.append(dchunk)
+            stream_d[key] = dchunk_l
+        frame_rate = round(1/seq_d["_frame_time"])
+        if record_master is None:
+            record_master = RecordMaster([(stream_d["main_tp"][0],stream_d["signals"][0])], frame_rate=frame_rate)
+            record_master._sep_size = handle.manifest["_sep_size"]
+        else:
+            record_master.append(stream_d["main_tp"][0],stream_d["signals"][0], frame_rate=frame_rate)
+        for kstream, vstream in stream_d.items():
+            for k, dc in enumerate(vstream):
+                if kstream in ["main_tp", "signals"] and k==0:
+                    continue
+                record_master.set_datachunk(dc, name=kstream, sequence_idx=j)
+    record_master._shared = shm
+    _SHARED_RECORDS[handle.name] = record_master
     return record_master
\ No newline at end of file
@@ -9,6 +9,8 @@ import math
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 
+from .config import *
+
 # Cell
 def get_dome_positions(mode="cartesian"):
     """
@@ -184,7 +186,7 @@ def _chain_stripes(stripe_dict):
     return np.array(res)
 
 # Cell
-def build_wave_stimulus_array(epoch_sequence, wave_width=0.58, wave_speed=.58, n_frame_epoch=640, n_frame_isi=50, frame_rate=100):
+def build_wave_stimulus_array(epoch_sequence, wave_width=0.58, wave_speed=.58, n_frame_epoch=640, n_frame_isi=50, frame_rate=100, dtype=None):
     """
     Build the numpy stimulus matrix of the LED values for each frame.
     params:
@@ -194,6 +196,7 @@ def build_wave_stimulus_array(epoch_sequence, wave_width=0.58, wave_speed=.58, n
         - n_frame_epoch: Number of frames that an epoch last
         - n_frame_isi: Number of frames during teh inter-stimulus-interval
         - frame_rate: Frame rate of the display
+        - dtype: Storage dtype of the LED values. Defaults to config.storage_dtype["stim"]
     returns:
         - LED values for the wave stimulus, in shape (t, 4, 237), where t=n_epoch*(n_frame_epoch+n_frame_isi)
     """
@@ -234,7 +237,7 @@ def build_wave_stimulus_array(epoch_sequence, wave_width=0.58, wave_speed=.58, n
     wave_elevations = np.arange(n_frame_epoch)*frame_step #Building the values used to compare the LED_elevation with
 
     time_shape = n_epoch*(n_frame_epoch+n_frame_isi)
-    result     = np.empty((time_shape, *theta_leds.shape))
+    result     = np.zeros((time_shape, *theta_leds.shape), dtype=resolve_dtype(np.array([0., 1.]), "stim", dtype))
     for i, LED_elevation in enumerate(LED_elevations):
         for j, wave_elevation in enumerate(wave_elevations):
             result[i*(n_frame_epoch+n_frame_isi)+j] = (wave_elevation-wave_width<LED_elevation) & (LED_elevation<wave_elevation)
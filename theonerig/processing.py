@@ -13,6 +13,7 @@ from sklearn import cluster
 import scipy.ndimage as ndimage
 import scipy.signal as signal
 import scipy as sp
+import scipy.sparse
 from cmath import *
 import itertools
 import random
@@ -77,7 +78,7 @@ def eyetrack_stim_inten(stim_inten, eye_track,
 
     xpos_avg = np.mean(eye_x)
     ypos_avg = np.mean(eye_y)
-    mean_stim_inten = int((np.max(stim_inten)+np.min(stim_inten))/2)
+    mean_stim_inten = int((int(np.max(stim_inten))+int(np.min(stim_inten)))/2) #int() avoids uint8 overflow
     #After getting the shift of the matrix to apply, we roll the matrix instead of extending it to the shifts
     #This seems strange, but from the cell point of view, that is potentially looking at no stimulus,
     # the response it gives are uncorrelated with the stimulus, and so shouldn't impact further analysis
@@ -257,13 +258,16 @@ def staEst_fromBins(stim, spike_counts, Hw, Fw=0):
 
     params:
         - stim_inten: stimulus intensity matrix of shape (flattened_frame, t)
-        - spike_counts: cells activity matrix of shape (t, n_cell)
+        - spike_counts: cells activity matrix of shape (t, n_cell). Can be a SparseDataChunk.
         - Hw: Lenght in frames of the history window, including the 0 timepoint
         - Fw: Lenght in frames of the forward window
 
     return:
         - STA of shape (n_cell, Hw+Fw, flattened_frame)
     """
+    if isinstance(spike_counts, SparseDataChunk):
+        return _staEst_fromSparse(stim, spike_counts.sparse, Hw, Fw=Fw)
+    spike_counts = np.array(spike_counts, dtype=float) #Copy, so the caller's array (maybe a record view) is untouched
     spike_counts[:Hw] = 0
 
     spike_counts = np.nan_to_num(spike_counts / np.sum(spike_counts,axis=0))
@@ -281,6 +285,35 @@ def staEst_fromBins(stim, spike_counts, Hw, Fw=0):
     spike_counts = np.roll(spike_counts, -Fw, axis=0)
     return np.transpose(sta, (2,0,1))
 
+def _staEst_fromSparse(stim, spike_counts, Hw, Fw=0):
+    """
+    Same as staEst_fromBins for a scipy.sparse spike_counts. Centering the spike counts would make
+    them dense, so the stimulus is shifted instead of the spike counts, and the mean of the spike counts
+    is subtracted from the dot products: stim @ (S - mean) = stim @ S - sum(stim) * mean
+    """
+    len_t  = spike_counts.shape[0]
+    mask   = np.ones(len_t)
+    mask[:Hw] = 0
+    spike_counts = scipy.sparse.diags(mask) @ scipy.sparse.csr_matrix(spike_counts, dtype=float)
+    n_spikes     = np.asarray(spike_counts.sum(axis=0)).ravel()
+    spike_counts = spike_counts @ scipy.sparse.diags(np.divide(1, n_spikes, out=np.zeros(len(n_spikes)),
+                                                               where=n_spikes!=0))
+    mean_counts  = np.asarray(spike_counts.mean(axis=0)).ravel()
+    spike_counts_T = spike_counts.T.tocsr()
+
+    sta = np.zeros((Hw+Fw, stim.shape[0], spike_counts.shape[-1]))
+    for i in range(Hw):
+        stim_shifted  = np.roll(stim, i, axis=1)
+        sta[Hw-1-i]   = (spike_counts_T @ stim_shifted.T).T - np.outer(stim_shifted.sum(axis=1), mean_counts)
+    if Fw != 0:
+        mask = np.ones(len_t)
+        mask[-Fw:] = 0 #The last frames are set to 0 after centering
+        spike_counts_T = (scipy.sparse.diags(mask) @ spike_counts).T.tocsr()
+        for i in range(Fw):
+            stim_shifted = np.roll(stim, -(i+1), axis=1)
+            sta[Hw+i]    = (spike_counts_T @ stim_shifted.T).T - np.outer(stim_shifted @ mask, mean_counts)
+    return np.transpose(sta, (2,0,1))
+
 def process_sta_batch_large(stim_inten, spike_counts, Hw=30, Fw=2, return_pval=False, normalisation="abs", bs=1000):
     """
     Computes the STA and associated pvalues in parallel for a batch of cells, for a large stimulus.
@@ -12,6 +12,7 @@ import re
 
 from .io import *
 from ..utils import *
+from ..config import *
 
 def get_QDSpy_logs(log_dir):
     """Factory function to generate QDSpy_log objects from all the QDSpy logs of the folder `log_dir`"""
@@ -181,11 +182,12 @@ def get_synced_file(stim_list_dir, stim_id):
     return stim, stim_path
 
 # Cell
-def unpack_stim_npy(npy_dir, md5_hash):
+def unpack_stim_npy(npy_dir, md5_hash, dtype=None):
     """Find the stimuli of a given hash key in the npy stimulus folder. The stimuli are in a compressed version
     comprising three files. inten for the stimulus values on the screen, marker for the values of the marker
     read by a photodiode to get the stimulus timing during a record, and an optional shader that is used to
-    specify informations about a shader when used, like for the moving gratings."""
+    specify informations about a shader when used, like for the moving gratings. inten and marker are unpacked
+    with the dtype resolved from config.storage_dtype["stim"], unless dtype is given."""
 
     #Stimuli can be either npy or npz (useful when working remotely)
     def find_file(ftype):
@@ -203,11 +205,11 @@ def unpack_stim_npy(npy_dir, md5_hash):
     shader, unpack_shader = None, None
     if len(glob.glob(os.path.join(npy_dir, "*_shader_"+md5_hash+".np*")))>0:
         shader        = find_file("shader")
-        unpack_shader = np.empty((np.sum(marker[:,0]), *shader.shape[1:]))
+        unpack_shader = np.empty((np.sum(marker[:,0]), *shader.shape[1:]), dtype=shader.dtype)
 
     #The latter unpacks the arrays
-    unpack_inten  = np.empty((np.sum(marker[:,0]), *inten.shape[1:]))
-    unpack_marker = np.empty(np.sum(marker[:,0]))
+    unpack_inten  = np.empty((np.sum(marker[:,0]), *inten.shape[1:]), dtype=resolve_dtype(inten, "stim", dtype))
+    unpack_marker = np.empty(np.sum(marker[:,0]), dtype=resolve_dtype(marker[:,1], "stim", dtype))
 
     cursor = 0
     for i, n_frame in enumerate(marker[:,0]):
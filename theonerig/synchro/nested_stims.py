@@ -212,11 +212,9 @@ def twoP_dataChunks_2(ref_timepoints, frame_timepoints, len_epochs, cursor, skip
         else:
             last_ca = frame_timepoints[i][len_epoch-1]
         if isinstance(ref_timepoints, Data_Pipe):
-            start_idx = np.argmax(ref_timepoints[i]['main_tp']>first_ca)
-            stop_idx  = np.argmax(ref_timepoints[i]['main_tp']>last_ca)
+            start_idx, stop_idx = TimeIndex(ref_timepoints[i]['main_tp']).sample_to_frame([first_ca, last_ca])
         else:
-            start_idx = np.argmax(ref_timepoints>first_ca)
-            stop_idx  = np.argmax(ref_timepoints>last_ca)
+            start_idx, stop_idx = TimeIndex(ref_timepoints).sample_to_frame([first_ca, last_ca])
         for k, matrix in enumerate(args):
             # Slice the Ca-matrix in the time dimension to the duration of the recording block
             sub_mat = matrix.T[cursor:cursor+len_epoch]
@@ -12,6 +12,8 @@ import glob
 import os
 from scipy import signal
 
+from ..core import TimeIndex
+
 # Cell
 def get_thresholds(data):
     """Function that attempts to get the high and low thresholds. Not working very well"""
@@ -247,7 +249,7 @@ def match_starting_position(frame_timepoints, frame_signals, stim_signals, estim
         - best match for the starting position of the stimulus
     """
     stim_matching_len = min(600, np.where(np.diff(stim_signals)!=0)[0][50]) #Way of getting the 50th change in the signals
-    idx_estimate = np.argmax(frame_timepoints>estimate_start)
+    idx_estimate = TimeIndex(frame_timepoints).sample_to_frame(estimate_start)
     search_slice = slice(max(0, idx_estimate-search_size-frame_signals.idx), min(idx_estimate+search_size-frame_signals.idx, len(frame_signals)))
     return search_slice.start + np.argmax(np.correlate(frame_signals[search_slice],
                                                        stim_signals[:stim_matching_len]))
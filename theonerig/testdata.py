@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 99_testdata.ipynb (unless otherwise specified).
 
-__all__ = ['load_vivo_2p']
+__all__ = ['load_vivo_2p', 'synthetic_record']
 
 # Cell
 import numpy as np
@@ -8,7 +8,7 @@ import pickle
 from os.path import join
 import matplotlib.pyplot as plt
 
-from .core import import_record
+from .core import import_record, RecordMaster, DataChunk
 
 
 def load_vivo_2p(testdata_dir):
@@ -34,4 +34,60 @@ def load_vivo_2p(testdata_dir):
     with open(join(vivo_2p_dir, "twoP_frame_timepoints.pkl"), mode="rb") as f:
         rec_TP = pickle.load(f)
     print("Returning stim_d, S_matrix, A_matrix, proj_TP, proj_DATA, eye_TP, eye_DATA, treadm_DATA, len_records, rec_TP, reM")
-    return locals()
\ No newline at end of file
+    return locals()
+
+# Cell
+_SYNTH_STIMS = [("checkerboard", (10, 10)), ("fullfield_flicker", ()), ("chirp_am", ()), ("moving_gratings", (3,))]
+
+def synthetic_record(n_sequences=1, length=36000, frame_rate=60, n_stims=4, n_cells=50, fragmentation=1,
+                     sampling_rate=10000, seed=0) -> RecordMaster:
+    """
+    Builds a RecordMaster of random data shaped like a real record.
+
+    params:
+        - n_sequences: Number of sequences of the record
+        - length: Number of frames of each sequence, or list of the lengths of the sequences
+        - frame_rate: Frame rate of each sequence, or list of the frame rates of the sequences
+        - n_stims: Number of stimuli played one after the other in each sequence. They cycle over checkerboard (t, 10, 10),
+                   fullfield_flicker (t), chirp_am (t) and moving_gratings (t, 3), so a name is repeated when n_stims>4
+        - n_cells: Number of cells of the spike counts
+        - fragmentation: Number of contiguous DataChunks the spike counts of a sequence are split into
+        - sampling_rate: Sampling rate of the main device, giving the main_tp of the sequences
+        - seed: Seed of the random generator
+
+    return:
+        - RecordMaster with the stimuli (group "stim", uint8), "S_matrix" spike counts (group "cell", uint16)
+        and "eye_tracking" (group "data", (t, 5) float) in each sequence
+    """
+    rng = np.random.default_rng(seed)
+    if not hasattr(length, '__iter__'):
+        length = [length]*n_sequences
+    if not hasattr(frame_rate, '__iter__'):
+        frame_rate = [frame_rate]*n_sequences
+
+    references = []
+    for seq_len, fr in zip(length, frame_rate):
+        main_tp = np.arange(seq_len, dtype=np.int64)*int(sampling_rate/fr)
+        signals = rng.integers(0, 2, seq_len).astype(float)
+        references.append((DataChunk(main_tp, 0, "sync"), DataChunk(signals, 0, "sync")))
+    reM = RecordMaster(references, frame_rate=list(frame_rate))
+
+    for seq, seq_len in zip(reM, length):
+        #Stimuli spread over the sequence, with a gap of a tenth of their length before each
+        stim_len = seq_len//max(n_stims, 1)
+        gap      = stim_len//10
+        for i in range(n_stims):
+            name, shape = _SYNTH_STIMS[i%len(_SYNTH_STIMS)]
+            stim = rng.integers(0, 2, (stim_len-gap, *shape), dtype=np.uint8)*255
+            seq[name] = DataChunk(stim, i*stim_len+gap, "stim")
+
+        cell_map = dict([(cell, i) for i, cell in enumerate(range(n_cells))])
+        for frames in np.array_split(np.arange(seq_len), fragmentation):
+            if len(frames)==0:
+                continue
+            dc = DataChunk(rng.poisson(.5, (len(frames), n_cells)).astype(np.uint16), int(frames[0]), "cell")
+            dc.attrs["cell_map"] = cell_map
+            seq["S_matrix"] = dc
+
+        seq["eye_tracking"] = DataChunk(rng.random((seq_len, 5)), 0, "data")
+    return reM
\ No newline at end of file
@@ -18,6 +18,7 @@ import scipy.interpolate as interpolate
 from scipy.ndimage import convolve1d
 from scipy.signal import savgol_filter
 import scipy.stats
+import scipy.sparse
 from scipy.ndimage import gaussian_filter
 import matplotlib.pyplot as plt
 import math
@@ -25,10 +26,11 @@ from cmath import *
 from PIL import Image
 
 from .core import *
+from .config import *
 
 # Cell
 def extend_sync_timepoints(timepoints:np.ndarray, signals:np.ndarray,
-                           up_bound, low_bound=0) -> Tuple[DataChunk, DataChunk]:
+                           up_bound, low_bound=0, delta=False) -> Tuple[DataChunk, DataChunk]:
     """
     Extend arrays of timepoints and signals (with identical shape) from the low_bound up to the up_bound.
     For example, the first timepoint could be 2000, and with a low_bound of 0, it would add the
@@ -40,6 +42,7 @@ def extend_sync_timepoints(timepoints:np.ndarray, signals:np.ndarray,
         - signals: Signals to extend
         - up_bound: Up bound to which to extend both timepoints and signals
         - low_bound: Low bound to which to extend both timepoints and signals
+        - delta: If True, the extended timepoints are a delta encoded TimepointDataChunk
 
     returns:
         - timepoint: Extended timepoints
@@ -60,13 +63,16 @@ def extend_sync_timepoints(timepoints:np.ndarray, signals:np.ndarray,
                                      timepoints,
                                      right_side))
 
-    timepoint_chunk = DataChunk(data=new_timepoints, idx=0, group="sync")
+    if delta:
+        timepoint_chunk = TimepointDataChunk(new_timepoints, idx=0, group="sync")
+    else:
+        timepoint_chunk = DataChunk(data=new_timepoints, idx=0, group="sync")
     signal_chunk    = DataChunk(data=signals, idx=len(left_side), group="sync")
     return (timepoint_chunk, signal_chunk)
 
 # Cell
 def align_sync_timepoints(timepoints:DataChunk, signals:DataChunk,
-                          ref_timepoints:DataChunk, ref_signals:DataChunk) -> Tuple[DataChunk, DataChunk, DataChunk]:
+                          ref_timepoints:DataChunk, ref_signals:DataChunk, delta=False) -> Tuple[DataChunk, DataChunk, DataChunk]:
     """
     Align the signals of a timepoints timeserie to a reference ref_timepoints with the corresponding
     ref_signals. ref_timepoints is extended to match ref_timepoints lenght.
@@ -76,6 +82,7 @@ def align_sync_timepoints(timepoints:DataChunk, signals:DataChunk,
         - signals: signals to align
         - ref_timepoints: reference timepoints
         - ref_signals: reference signals
+        - delta: If True, the aligned timepoints are delta encoded TimepointDataChunk
 
     return:
         - Aligned timepoints (DataChunk)
@@ -119,19 +126,20 @@ def align_sync_timepoints(timepoints:DataChunk, signals:DataChunk,
                                     init+(spb_ref*shift_right+1),
                                     spb_ref)[:shift_right].astype(int)
 
-    timepoint    = DataChunk(data=np.concatenate((left_timepoints,
-                                     timepoints,
-                                     right_timepoints)), idx=0, group="sync")
+    timepoint_cls = TimepointDataChunk if delta else DataChunk
+    timepoint     = timepoint_cls(np.concatenate((left_timepoints,
+                                                  timepoints,
+                                                  right_timepoints)), idx=0, group="sync")
 
-    timepoint_ref = DataChunk(data=np.concatenate((left_timepoints_ref,
-                                     ref_timepoints,
-                                     right_timepoints_ref)), idx=0, group="sync")
+    timepoint_ref = timepoint_cls(np.concatenate((left_timepoints_ref,
+                                                  ref_timepoints,
+                                                  right_timepoints_ref)), idx=0, group="sync")
 
     return (timepoint, timepoint_ref, ref_signals)
 
 # Cell
 def resample_to_timepoints(timepoints:np.ndarray, data:np.ndarray,
-                             ref_timepoints:DataChunk, group="data") -> DataChunk:
+                             ref_timepoints:DataChunk, group="data", lazy=False) -> DataChunk:
     """
     Resample the data at timepoints to new timepoints given by ref_timepoints.
     Return a DataChunk of the resampled data belonging to a specified group.
@@ -141,6 +149,7 @@ def resample_to_timepoints(timepoints:np.ndarray, data:np.ndarray,
         - data: Data to resample of shape (t, ...)
         - ref_timepoints: Target timepoints for the resampling
         - group: Group assigned to the returned DataChunk
+        - lazy: If True, returns a StreamDataChunk keeping the data at its rate, resampled when read
 
     return:
         - Resampled datachunk with appropriate idx.
@@ -150,14 +159,13 @@ def resample_to_timepoints(timepoints:np.ndarray, data:np.ndarray,
     timepoints = np.array(timepoints)
     data = np.array(data)
 
-    start_idx = np.argmax(ref_timepoints >= timepoints[0])
-    stop_idx  = np.argmax(ref_timepoints >= timepoints[-1])
-    if stop_idx == 0:
-        stop_idx = len(ref_timepoints)
+    start_idx, stop_idx = TimeIndex(ref_timepoints).sample_to_frame([timepoints[0], timepoints[-1]], side="left")
+    if lazy:
+        return StreamDataChunk(data, timepoints, ref_timepoints[start_idx:stop_idx],
+                               idx=ref_timepoints.idx + start_idx, group=group)
 
     if len(ref_timepoints[start_idx:stop_idx]) < len(timepoints): #Downsampling
-        distance = (np.argmax(timepoints>ref_timepoints[start_idx+1])
-                - np.argmax(timepoints>ref_timepoints[start_idx]))
+        distance = np.diff(TimeIndex(timepoints).sample_to_frame(ref_timepoints[start_idx:start_idx+2]))[0]
 
         kernel = np.ones(distance)/distance
         data = convolve1d(data, kernel, axis=0) #Smooting to avoid weird sampling
@@ -238,7 +246,7 @@ def flip_gratings(stim_shader, ud_inv, lr_inv):
         stim_shader[mask_epochs,1] = (360 - stim_shader[mask_epochs,1]) % 360
     return stim_shader
 
-def stim_to_dataChunk(stim_inten, stim_start_idx, reference:DataChunk) -> DataChunk:
+def stim_to_dataChunk(stim_inten, stim_start_idx, reference:DataChunk, dtype=None) -> DataChunk:
     """
     Factory function for DataChunk of a stimulus, that squeeze the stim_inten matrix.
 
@@ -246,11 +254,13 @@ def stim_to_dataChunk(stim_inten, stim_start_idx, reference:DataChunk) -> DataCh
         - stim_inten: Stimulus matrix of shape (t, ...)
         - stim_start_idx: Starting frame index of the stimulus
         - reference: DataChunk signal reference used to determine the starting index of the stimulus
+        - dtype: Storage dtype of the stimulus. Defaults to config.storage_dtype["stim"]
 
     return:
         - Datachunk of the stimulus
     """
-    return DataChunk(data=np.squeeze(stim_inten), idx = (stim_start_idx + reference.idx), group="stim")
+    stim_inten = as_storage_dtype(np.squeeze(stim_inten), "stim", dtype)
+    return DataChunk(data=stim_inten, idx = (stim_start_idx + reference.idx), group="stim")
 
 # Cell
 def phy_results_dict(phy_dir):
@@ -278,13 +288,16 @@ def phy_results_dict(phy_dir):
 
     return res_dict
 
-def spike_to_dataChunk(spike_timepoints, ref_timepoints:DataChunk) -> DataChunk:
+def spike_to_dataChunk(spike_timepoints, ref_timepoints:DataChunk, sparse=False, dtype=None, events=False) -> DataChunk:
     """
     Factory function of a DataChunk for spiking count of cells from spike timepoints.
 
     params:
         - spike_timepoints: Dictionnary of the cells spike timepoints (list)
         - ref_timepoints: Reference DataChunk to align the newly created spike count Datachunk
+        - sparse: If True, returns a SparseDataChunk, without allocating the dense matrix
+        - dtype: Storage dtype of the counts. Defaults to config.storage_dtype["counts"]
+        - events: If True, returns an EventDataChunk keeping the spike timepoints, to bin them at other resolutions
 
     return:
         - Spike count datachunk of shape (t, n_cell)
@@ -293,9 +306,39 @@ def spike_to_dataChunk(spike_timepoints, ref_timepoints:DataChunk) -> DataChunk:
     cell_keys = sorted(map(int,
                                     spike_timepoints.keys()))
     cell_map = dict([ (cell_key, i) for i, cell_key in enumerate(cell_keys) ])
-    spike_bins = np.zeros((ref_timepoints.shape[0], len(cell_keys)))
     bins = np.concatenate((ref_timepoints[:], [(ref_timepoints[-1]*2)-ref_timepoints[-2]]))
-
+    #A bin can't count more spikes than the cell has, so the dtype is resolved on that bound
+    max_count = max([len(spike_timepoints[type_cast(cell)]) for cell in cell_keys], default=0)
+    dtype = resolve_dtype(np.array([0., max_count]), "counts", dtype)
+
+    if events:
+        columns = []
+        for cell in cell_keys:
+            spikes = np.sort(np.asarray(spike_timepoints[type_cast(cell)]))
+            columns.append(spikes[(spikes >= bins[0]) & (spikes <= bins[-1])])
+        offsets   = np.cumsum([0]+[len(spikes) for spikes in columns])
+        datachunk = EventDataChunk(np.concatenate(columns), offsets, bins, idx=ref_timepoints.idx,
+                                   group="cell", dtype=dtype)
+        datachunk.attrs["cell_map"] = cell_map
+        return datachunk
+
+    if sparse:
+        rows, cols = [], []
+        for i, cell in enumerate(cell_keys):
+            spikes = np.asarray(spike_timepoints[type_cast(cell)])
+            spikes = spikes[(spikes >= bins[0]) & (spikes <= bins[-1])]
+            #Spikes at the end of the last bin are counted in it, as with np.histogram
+            frames = np.minimum(TimeIndex(bins).sample_to_frame(spikes)-1, len(bins)-2)
+            rows.append(frames)
+            cols.append(np.full(len(frames), i))
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        spike_bins = scipy.sparse.csr_matrix((np.ones(len(rows), dtype=dtype), (rows, cols)), #Duplicates are summed
+                                             shape=(ref_timepoints.shape[0], len(cell_keys)))
+        datachunk  = SparseDataChunk(spike_bins, idx=ref_timepoints.idx, group="cell")
+        datachunk.attrs["cell_map"] = cell_map
+        return datachunk
+
+    spike_bins = np.zeros((ref_timepoints.shape[0], len(cell_keys)), dtype=dtype)
     for i, cell in enumerate(cell_keys):
         spike_bins[:, i] = np.histogram(spike_timepoints[type_cast(cell)], bins)[0]
 
@@ -322,7 +365,7 @@ def get_calcium_stack_lenghts(folder):
             record_lenghts.append(int(re.findall(pattern_nFrame, line)[0]))
     return record_lenghts
 
-def twoP_dataChunks(ref_timepoints:DataChunk, frame_timepoints, len_epochs, *args):
+def twoP_dataChunks(ref_timepoints:DataChunk, frame_timepoints, len_epochs, *args, dtype=None, lazy=False):
     """
     Factory function for two photon data.
 
@@ -331,6 +374,9 @@ def twoP_dataChunks(ref_timepoints:DataChunk, frame_timepoints, len_epochs, *arg
         - frame_timepoints: List of frame timepoints for each sequence of two photon frame recorded.
         - len_epochs: Lenght of the recorded epochs (<= than the corresponding frame_timepoints). Int or list
         - args: matrices of all frames detected by CaImAn. (give as many as you want to synchronise)
+        - dtype: Storage dtype of the matrices. Defaults to config.storage_dtype["calcium"]
+        - lazy: If True, the DataChunks are StreamDataChunk keeping the frames of the two photon, interpolated
+                linearly at their timepoints when read
 
     return:
         - tuple containing the synchronised matrices in the order it was given
@@ -340,15 +386,22 @@ def twoP_dataChunks(ref_timepoints:DataChunk, frame_timepoints, len_epochs, *arg
     cursor = 0
     if isinstance(len_epochs, int):
         len_epochs = [len_epochs]
+    time_index = TimeIndex(ref_timepoints)
     # For every recording block (defined by len_epochs),
     for i, len_epoch in enumerate(len_epochs):
-        start_idx = np.argmax(ref_timepoints>frame_timepoints[i][0])
-        stop_idx  = np.argmax(ref_timepoints>frame_timepoints[i][len_epoch-1])
+        start_idx, stop_idx = time_index.sample_to_frame([frame_timepoints[i][0], frame_timepoints[i][len_epoch-1]])
         for k, matrix in enumerate(args):
             sub_mat = matrix.T[cursor:cursor+len_epoch]
+            if lazy:
+                stream = StreamDataChunk(as_storage_dtype(sub_mat, "calcium", dtype), frame_timepoints[i][:len_epoch],
+                                         ref_timepoints[start_idx:stop_idx], idx=start_idx, group="cell")
+                stream.attrs["smoothing"] = "none"
+                res_l[k].append(stream)
+                continue
 
             f = interpolate.interp1d(range(len_epoch), sub_mat, axis=0)
-            res_l[k].append(DataChunk(data=f(np.linspace(0,len_epoch-1,stop_idx-start_idx)),
+            interp = as_storage_dtype(f(np.linspace(0,len_epoch-1,stop_idx-start_idx)), "calcium", dtype)
+            res_l[k].append(DataChunk(data=interp,
                                            idx=start_idx,
                                            group="cell"))
         cursor += len_epoch
@@ -406,6 +459,7 @@ def group_direction_response(stim_prop, spike_counts, n_repeat, n_cond=32):
     return:
         - dictionnary of the spike counts for each condition (speed/size), with shape (n_angle, n_repeat, len, n_cell)
     """
+    spike_counts = np.asarray(spike_counts) #A SparseDataChunk is densified here, over the stimulus only
 
     n_cell = spike_counts.shape[-1]
     condition_repeat = stim_prop.reshape(n_repeat*n_cond,-1,3)[:,10,:] #Take the condition for each repeat
@@ -443,6 +497,7 @@ def group_chirp_bumps(stim_inten, spike_counts, n_repeat):
     return:
         - Dictionnary of cells response to the different ON or OFF stimuli
     """
+    spike_counts = np.asarray(spike_counts) #A SparseDataChunk is densified here, over the stimulus only
 
     repeat = stim_inten.reshape(n_repeat,-1)[0]
     spike_counts = spike_counts.reshape(n_repeat,-1,spike_counts.shape[-1])
@@ -497,6 +552,8 @@ def get_repeat_corrected(stim_inten, spike_counts, n_repeats=10):
         - aligned cells response to stimulus, of shape (n_repeat, t, n_cell)
         - Number of duplicated frame per repetition.
     """
+    spike_counts = np.asarray(spike_counts) #A SparseDataChunk is densified here, over the stimulus only
+
     def count_repl_in_range(fr_replaced, _range):
         return sum([repl[0] in _range for repl in fr_replaced])
 
@@ -682,6 +739,8 @@ def group_omitted_epochs(stim_inten, spike_counts, n_fr_flash=4, n_fr_interflash
     return:
         - response_d_ON, response_d_OFF: Dictionnaries of the cells responses for different number of flashes repetions. Each contain an array of shape (n_cell, n_repeats, len_epoch+n_fr_isi).
     """
+    spike_counts = np.asarray(spike_counts) #A SparseDataChunk is densified here, over the stimulus only
+
     starts_ON    = []
     stops_ON     = []
     n_flashes_ON = []